@@ -1,9 +1,12 @@
 import random
 import asyncio
+import logging
+from collections import Counter
 from duckduckgo_search import DDGS
 from tools.new_tools import get_proxy_list
 import pandas as pd
-from tools.scrape import scrape_url_list
+from tools.enrich import Enricher
+from tools.records import SearchRecord
 from typing import List, Dict, Optional
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -11,11 +14,14 @@ from langchain_groq import ChatGroq
 from datetime import datetime
 import os
 
+logger = logging.getLogger(__name__)
 
 
 class SearchScraper:
-    def __init__(self):
+    def __init__(self, enrich_top_k: int = 2, enrich_deadline: float = 10.0):
         self.sleep_times = [2, 3, 4, 5, 6]
+        # Scrape only the best-ranked result URLs (fewer than max_search_results), bounded by a wall-clock deadline
+        self.enricher = Enricher(top_k=enrich_top_k, deadline=enrich_deadline)
         self.max_search_results = 3
         self.proxies_list = get_proxy_list()
         self.user_agents = [
@@ -33,7 +39,7 @@ class SearchScraper:
             verbose=True,
             api_key=os.getenv('GROQ_API_KEY')
         )
-        print("LLM initialized successfully")
+        logger.debug("LLM initialized successfully")
         self.prompt_templates = {
             "product": """You are a product search specialist. Based on the search results, provide details about: {query}
 
@@ -81,55 +87,48 @@ class SearchScraper:
             OUTPUT FORMAT:
             [Company Name]<||>[Industry]<||>[Revenue]<||>[Headquarters]"""
         }
-        print(f"Found {len(self.proxies_list)} proxies")
+        logger.info(f"Found {len(self.proxies_list)} proxies")
 
     async def search_with_proxy(self, query: str) -> List[Dict]:
         proxy = random.choice(self.proxies_list)
         proxy_url = f"socks5://{proxy['ip']}:{proxy['port']}"
         user_agent = random.choice(self.user_agents)
-        print(f"\nUsing proxy {proxy_url}")
-        print(f"Searching for: {query}")
+        logger.debug(f"Searching for: {query} via {proxy_url}")
 
         self.ddgs.proxy = proxy_url
         self.ddgs.headers = {"User-Agent": user_agent}
 
         try:
             results = list(self.ddgs.text(query, max_results=self.max_search_results))
-            print(f"Found {len(results)} results")
+            logger.debug(f"Found {len(results)} results")
             return results
         except Exception as e:
-            print(f"Search error: {e}")
+            logger.warning(f"Search error for '{query}': {e}")
             return []
         finally:
             await asyncio.sleep(random.choice(self.sleep_times))
 
-    async def process_llm(self, query: str, search_type: str, search_results: pd.DataFrame) -> Optional[str]:
+    async def process_llm(self, query: str, search_type: str, search_results: List[SearchRecord]) -> Optional[str]:
         """Process search results with LLM"""
         try:
-            print("\n=== LLM Processing Start ===")
-            print(f"Processing query: {query}")
-            print(f"Search type: {search_type}")
+            logger.debug(f"LLM processing {search_type} query '{query}'")
             
-            if not isinstance(search_results, pd.DataFrame):
-                print(f"Error: search_results is not a DataFrame, got {type(search_results)}")
-                return None
-                
-            if search_results.empty:
-                print("Error: Empty search results DataFrame")
+            if not search_results:
+                logger.warning("Empty search results")
                 return None
 
             #Format search results for LLM
             formatted_results = ""
-            for _, row in search_results.iterrows():
-                formatted_results += f"SOURCE: {row['url']}\n"
-                formatted_results += f"TITLE: {row['title']}\n"
-                formatted_results += f"DESCRIPTION: {row['description']}\n"
-                formatted_results += f"CONTENT: {row['body'][:500]}...\n"
+            for record in search_results:
+                formatted_results += f"SOURCE: {record.url}\n"
+                formatted_results += f"TITLE: {record.title}\n"
+                formatted_results += f"DESCRIPTION: {record.description}\n"
+                formatted_results += f"CONTENT: {record.body[:500]}...\n"
                 formatted_results += "-" * 80 + "\n\n"
 
-            print(f"\nFormatted {len(search_results)} results for LLM")
-            print("Sample of formatted content:")
-            print(formatted_results[:500] + "..." if len(formatted_results) > 500 else formatted_results)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Formatted {len(search_results)} results for LLM:\n"
+                             + (formatted_results[:500] + "..." if len(formatted_results) > 500 else formatted_results))
 
             template = self.prompt_templates.get(search_type, self.prompt_templates["product"])
             
@@ -146,36 +145,29 @@ class SearchScraper:
                 scratchpad=[]
             )
             
-            print("\nSending to LLM with formatted content...")
             
             try:
                 response = self.llm.invoke(messages)
-                print("\nRaw LLM Response:", response)
+                logger.debug(f"Raw LLM Response: {response}")
                 
                 if hasattr(response, 'content'):
                     content = response.content.strip()
                     if content:
                         return content
                     else:
-                        print("Warning: Empty content from LLM")
+                        logger.warning("Empty content from LLM")
                         return None
                 else:
-                    print(f"Error: Unexpected response format: {type(response)}")
+                    logger.error(f"Unexpected response format: {type(response)}")
                     return None
                     
             except Exception as llm_error:
-                print(f"LLM invocation error: {str(llm_error)}")
-                import traceback
-                print("LLM Traceback:", traceback.format_exc())
+                logger.error(f"LLM invocation error: {str(llm_error)}", exc_info=logger.isEnabledFor(logging.DEBUG))
                 return None
                 
         except Exception as e:
-            print(f"LLM processing error: {str(e)}")
-            import traceback
-            print("Process LLM Traceback:", traceback.format_exc())
+            logger.error(f"LLM processing error: {str(e)}", exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
-        finally:
-            print("=== LLM Processing End ===\n")
 
     def parse_llm_response(self, response: str, search_type: str) -> Dict:
         if not response:
@@ -210,62 +202,45 @@ class SearchScraper:
     async def process_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         all_results = []
         
-        for index, row in df.iterrows():
-            print(f"\n{'='*50}")
-            print(f"Processing row {index + 1}/{len(df)}")
-            print(f"Query: {row['query']}")
-            print(f"Search type: {row['search_type']}")
+        for position, (index, row) in enumerate(zip(df.index, df.to_dict('records'))):
+            logger.info(f"Processing row {position + 1}/{len(df)}: {row['query']} ({row['search_type']})")
             
             try:
                 search_results = await self.search_with_proxy(row['query'])
-                print(f"\nSearch results type: {type(search_results)}")
-                print(f"Search results count: {len(search_results) if search_results else 0}")
+                logger.debug(f"Search results count: {len(search_results) if search_results else 0}")
                 
                 if search_results:
-                    ddg_results = []
-                    for result in search_results:
-                        ddg_data = {
-                            'url': result.get('link') or result.get('href', ''),
-                            'title': result.get('title', 'No title'),
-                            'description': result.get('snippet', 'No description'),
-                            'body': f"{result.get('title', '')} - {result.get('snippet', '')}",
-                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            'method': 'duckduckgo'
-                        }
-                        ddg_results.append(ddg_data)
-                    
-                    ddg_df = pd.DataFrame(ddg_results)
-                    print("\nDuckDuckGo results created")
-                    
-                    urls = [result.get('link') or result.get('href') for result in search_results 
-                           if result.get('link') or result.get('href')]
-                    print(f"Found {len(urls)} URLs to scrape: {urls}")
-                    
-                    combined_results = ddg_df.copy()
+                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    ddg_results = [
+                        SearchRecord(
+                            url=result.get('link') or result.get('href', ''),
+                            title=result.get('title', 'No title'),
+                            description=result.get('snippet', 'No description'),
+                            body=f"{result.get('title', '')} - {result.get('snippet', '')}",
+                            timestamp=timestamp,
+                            method='duckduckgo'
+                        )
+                        for result in search_results
+                    ]
                     
                     try:
-                        if urls:
-                            print("\nAttempting scraping...")
-                            scraped_df = scrape_url_list(urls)
-                            if isinstance(scraped_df, pd.DataFrame) and not scraped_df.empty:
-                                print("Adding scraped data to results")
-                                combined_results = pd.concat([combined_results, scraped_df], ignore_index=True)
-                                combined_results = combined_results.drop_duplicates(subset=['url'], keep='last')
+                        # Scraped pages replace the search row for the same url, as the old concat/drop_duplicates did
+                        ddg_results = await self.enricher.enrich(row['query'], row['search_type'], ddg_results)
                     except Exception as scrape_error:
-                        print(f"Scraping failed: {str(scrape_error)}")
+                        logger.warning(f"Scraping failed: {str(scrape_error)}")
                     
-                    if not combined_results.empty:
-                        print(f"\nCombined data shape: {combined_results.shape}")
-                        print("Sources:", combined_results['method'].value_counts().to_dict())
-                        
+                    combined_results = ddg_results
+                    
+                    if combined_results:
+                        logger.debug(f"Combined results: {len(combined_results)}, sources: "
+                                     f"{dict(Counter(record.method for record in combined_results))}")
 
-                        print("\nSending combined results to LLM...")
                         llm_response = await self.process_llm(row['query'], row['search_type'], combined_results)
-                        print("\nLLM Response received:", llm_response)
+                        logger.debug(f"LLM Response received: {llm_response}")
                         
                         if llm_response:
                             parsed_response = self.parse_llm_response(llm_response, row['search_type'])
-                            print("\nParsed Response:", parsed_response)
+                            logger.debug(f"Parsed Response: {parsed_response}")
                             
                             # Combine original query with LLM results
                             result = {
@@ -274,7 +249,6 @@ class SearchScraper:
                                 **parsed_response
                             }
                             all_results.append(result)
-                            print(f"\nAdded result for query: {row['query']}")
                         else:
                             result = self._create_default_response(row, 'llm_failed', combined_results)
                             all_results.append(result)
@@ -286,21 +260,24 @@ class SearchScraper:
                     all_results.append(result)
                 
             except Exception as e:
-                print(f"Error processing row {index}: {str(e)}")
+                logger.error(f"Error processing row {index}: {str(e)}")
                 result = self._create_default_response(row, 'error')
                 all_results.append(result)
                 continue
         
         if all_results:
             final_df = pd.DataFrame(all_results)
-            print("\nFinal DataFrame columns:", final_df.columns.tolist())
-            print("\nNumber of results:", len(final_df))
+            logger.debug(f"Final DataFrame columns: {final_df.columns.tolist()}")
+            logger.info(f"Number of results: {len(final_df)}")
             return final_df
         
-        print("No results to create DataFrame")
+        logger.warning("No results to create DataFrame")
         return pd.DataFrame()
 
-    def _create_default_response(self, row: pd.Series, status: str, data: pd.DataFrame = None) -> Dict:
+    async def close(self) -> None:
+        await self.enricher.close()
+
+    def _create_default_response(self, row: Dict, status: str, data: Optional[List[SearchRecord]] = None) -> Dict:
         """Helper method to create default responses"""
         response = {
             'original_query': row['query'],
@@ -322,11 +299,17 @@ class SearchScraper:
         return response
 
 async def main():
+    # LOG_LEVEL=DEBUG brings back full prompts and raw LLM responses
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(),
+                        format='%(asctime)s - %(levelname)s - %(message)s')
     # Test DataFrame
     df = pd.read_csv("search_data.csv")
     
     scraper = SearchScraper()
-    result_df = await scraper.process_dataframe(df)
+    try:
+        result_df = await scraper.process_dataframe(df)
+    finally:
+        await scraper.close()
     
     if not result_df.empty:
         print("\nFinal Results:")
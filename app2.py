@@ -1,9 +1,11 @@
 import streamlit as st
-import asyncio
 import pandas as pd
-from tools.scrape import scrape_url_list
 from datetime import datetime
-from app import SearchScraper  # Reuse the main class
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict
+from app_v2 import SearchScraper  # Async scraper: safe to share on one event loop
+from tools.service import ScraperService
+from tools.sinks import SINKS, save_results
 import time
 
 # Configure Streamlit page
@@ -21,81 +23,44 @@ if 'results' not in st.session_state:
 if 'progress' not in st.session_state:
     st.session_state.progress = 0
 
-async def process_with_progress(df: pd.DataFrame, progress_bar) -> pd.DataFrame:
-    """Process DataFrame with progress updates"""
-    scraper = SearchScraper()
-    all_results = []
+@st.cache_resource
+def get_scraper_service() -> ScraperService:
+    """One warm scraper (proxy pool, HTTP clients, caches) shared by every session and run.
+    Keeps app2's top-2 page enrichment; extraction uses app_v2's model (llama-3.3-70b-versatile)."""
+    return ScraperService(scraper_factory=lambda: SearchScraper(enrich_top_k=2))
+
+def process_with_progress(df: pd.DataFrame, progress_bar, status_text) -> pd.DataFrame:
+    """Process DataFrame with progress updates. The batch runs on the shared service loop,
+    where searches and LLM calls never block it; this script thread only polls progress."""
+    progress = {'done': 0, 'query': None}
+
+    def on_progress(done: int, total: int, row: Dict) -> None:
+        # Called on the service thread, so only record it; Streamlit is updated below
+        progress['done'] = done
+        progress['query'] = row['query']
+
+    future = get_scraper_service().process_dataframe(df, concurrent=True, progress_callback=on_progress)
     total_rows = len(df)
-    
-    for index, row in df.iterrows():
-        try:
-            # Update progress
-            progress = (index + 1) / total_rows
-            progress_bar.progress(progress)
-            st.write(f"Processing {row['query']} ({index + 1}/{total_rows})")
-            
-            search_results = await scraper.search_with_proxy(row['query'])
-            
-            if search_results:
-                ddg_results = []
-                for result in search_results:
-                    ddg_data = {
-                        'url': result.get('link') or result.get('href', ''),
-                        'title': result.get('title', 'No title'),
-                        'description': result.get('snippet', 'No description'),
-                        'body': f"{result.get('title', '')} - {result.get('snippet', '')}",
-                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        'method': 'duckduckgo'
-                    }
-                    ddg_results.append(ddg_data)
-                
-                ddg_df = pd.DataFrame(ddg_results)
-                
-                urls = [result.get('link') or result.get('href') for result in search_results 
-                       if result.get('link') or result.get('href')]
-                
-                combined_results = ddg_df.copy()
-                
-                try:
-                    if urls:
-                        scraped_df = scrape_url_list(urls)
-                        if isinstance(scraped_df, pd.DataFrame) and not scraped_df.empty:
-                            combined_results = pd.concat([combined_results, scraped_df], ignore_index=True)
-                            combined_results = combined_results.drop_duplicates(subset=['url'], keep='last')
-                except Exception as scrape_error:
-                    st.error(f"Scraping error for {row['query']}: {str(scrape_error)}")
-                
-                if not combined_results.empty:
-                    llm_response = await scraper.process_llm(row['query'], row['search_type'], combined_results)
-                    
-                    if llm_response:
-                        parsed_response = scraper.parse_llm_response(llm_response, row['search_type'])
-                        result = {
-                            'original_query': row['query'],
-                            'search_type': row['search_type'],
-                            **parsed_response
-                        }
-                        all_results.append(result)
-                    else:
-                        all_results.append(scraper._create_default_response(row, 'llm_failed'))
-                else:
-                    all_results.append(scraper._create_default_response(row, 'no_data'))
-            else:
-                all_results.append(scraper._create_default_response(row, 'no_results'))
-            
-        except Exception as e:
-            st.error(f"Error processing {row['query']}: {str(e)}")
-            all_results.append(scraper._create_default_response(row, 'error'))
-    
+    try:
+        while True:
+            try:
+                results_df = future.result(timeout=0.5)
+                break
+            except FutureTimeout:
+                progress_bar.progress(progress['done'] / total_rows if total_rows else 0.0)
+                if progress['query'] is not None:
+                    status_text.write(f"Processed {progress['query']} ({progress['done']}/{total_rows})")
+    finally:
+        # A rerun or closed tab stops this script; don't leave the batch running for nobody
+        future.cancel()
+
     progress_bar.progress(1.0)
-    return pd.DataFrame(all_results)
+    return results_df
 
-def save_dataframe(df: pd.DataFrame) -> str:
-    """Save DataFrame to CSV and return filename"""
+def save_dataframe(df: pd.DataFrame, output_format: str = "csv") -> str:
+    """Save DataFrame as csv, parquet or arrow and return filename"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f'search_results_{timestamp}.csv'
-    df.to_csv(filename, index=False)
-    return filename
+    return save_results(df, f'search_results_{timestamp}.{output_format}', output_format)
 
 def main():
     st.title("🔍 Search Agent")
@@ -115,6 +80,8 @@ def main():
             st.write("Preview of input data:")
             st.dataframe(df.head())
             
+            output_format = st.selectbox("Output format", list(SINKS))
+
             if st.button("Process Queries"):
                 st.session_state.processing = True
                 progress_bar = st.progress(0)
@@ -122,12 +89,12 @@ def main():
                 
                 # Process data
                 start_time = time.time()
-                results_df = asyncio.run(process_with_progress(df, progress_bar))
+                results_df = process_with_progress(df, progress_bar, status_text)
                 end_time = time.time()
                 
                 # Save results
                 if not results_df.empty:
-                    filename = save_dataframe(results_df)
+                    filename = save_dataframe(results_df, output_format)
                     
                     st.success(f"Processing completed in {end_time - start_time:.2f} seconds!")
                     st.write("Results preview:")
@@ -139,7 +106,7 @@ def main():
                             label="Download Results",
                             data=f,
                             file_name=filename,
-                            mime='text/csv'
+                            mime=SINKS[output_format].mime
                         )
                 else:
                     st.error("No results were generated")
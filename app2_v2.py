@@ -1,9 +1,10 @@
 import streamlit as st
-import asyncio
 import pandas as pd
 from datetime import datetime
-from app_v2 import SearchScraper  
-import time
+from app_v2 import SearchScraper
+from tools.jobs import Job, JobManager
+from tools.service import ScraperService
+from tools.sinks import SINKS, save_results
 
 # Configure Streamlit page
 st.set_page_config(
@@ -12,132 +13,114 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize session state
-if 'processing' not in st.session_state:
-    st.session_state.processing = False
-if 'results' not in st.session_state:
-    st.session_state.results = None
-if 'progress' not in st.session_state:
-    st.session_state.progress = 0
-
-async def process_with_progress(df: pd.DataFrame, progress_bar) -> pd.DataFrame:
-    """Process DataFrame with progress updates"""
-    scraper = SearchScraper()
-    all_results = []
-    total_rows = len(df)
-    
-    for index, row in df.iterrows():
-        try:
-            # Update progress
-            progress = (index + 1) / total_rows
-            progress_bar.progress(progress)
-            st.write(f"Processing {row['query']} ({index + 1}/{total_rows})")
-            
-            search_results = await scraper.search_with_proxy(row['query'])
-            
-            if search_results:
-                ddg_results = []
-                for result in search_results:
-                    ddg_data = {
-                        'url': result.get('link') or result.get('href', ''),
-                        'title': result.get('title', 'No title'),
-                        'description': result.get('snippet', 'No description'),
-                        'body': f"{result.get('body', '')} - {result.get('snippet', '')}",
-                        'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        'method': 'duckduckgo'
-                    }
-                    ddg_results.append(ddg_data)
-                
-                ddg_df = pd.DataFrame(ddg_results)
-                
-                urls = [result.get('link') or result.get('href') for result in search_results 
-                       if result.get('link') or result.get('href')]
-                
-                combined_results = ddg_df.copy()
-                
-                if not combined_results.empty:
-                    llm_response = await scraper.process_llm(row['query'], row['search_type'], combined_results)
-                    
-                    if llm_response:
-                        parsed_response = scraper.parse_llm_response(llm_response, row['search_type'])
-                        result = {
-                            'original_query': row['query'],
-                            'search_type': row['search_type'],
-                            **parsed_response
-                        }
-                        all_results.append(result)
-                    else:
-                        all_results.append(scraper._create_default_response(row, 'llm_failed'))
-                else:
-                    all_results.append(scraper._create_default_response(row, 'no_data'))
-            else:
-                all_results.append(scraper._create_default_response(row, 'no_results'))
-            
-        except Exception as e:
-            st.error(f"Error processing {row['query']}: {str(e)}")
-            all_results.append(scraper._create_default_response(row, 'error'))
-    
-    progress_bar.progress(1.0)
-    return pd.DataFrame(all_results)
-
-def save_dataframe(df: pd.DataFrame) -> str:
-    """Save DataFrame to CSV and return filename"""
+# Initialize session state; the job id also lives in the URL (?job=...) so a page reload
+# or a shared link reattaches to a job that is still on the server
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = st.query_params.get("job")
+if 'saved_files' not in st.session_state:
+    st.session_state.saved_files = {}
+
+@st.cache_resource
+def get_scraper_service() -> ScraperService:
+    """One warm scraper per server process, shared by every session and run"""
+    return ScraperService(scraper_factory=SearchScraper, max_jobs=2)
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """One manager per server process: jobs keep running across reruns and page reloads"""
+    return JobManager(get_scraper_service())
+
+def save_dataframe(df: pd.DataFrame, output_format: str = "csv") -> str:
+    """Save DataFrame as csv, parquet or arrow and return filename"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f'search_results_{timestamp}.csv'
-    df.to_csv(filename, index=False)
-    return filename
+    return save_results(df, f'search_results_{timestamp}.{output_format}', output_format)
+
+def render_finished(job: Job) -> None:
+    results_df = job.to_dataframe()
+    if job.status == "failed":
+        st.error(f"Processing failed: {job.error}")
+    elif job.status == "cancelled":
+        st.warning(f"Job cancelled after {job.done}/{job.total} rows")
+    if results_df.empty:
+        if job.status == "done":
+            st.error("No results were generated")
+        return
+
+    # Save once per job and format, not on every rerun
+    output_format = st.session_state.get("output_format", "csv")
+    filename = st.session_state.saved_files.get((job.job_id, output_format))
+    if filename is None:
+        filename = save_dataframe(results_df, output_format)
+        st.session_state.saved_files[(job.job_id, output_format)] = filename
+
+    if job.status == "done":
+        st.success(f"Processing completed in {job.elapsed:.2f} seconds!")
+    st.write("Results:")
+    st.dataframe(results_df)
+    with open(filename, 'rb') as f:
+        st.download_button(
+            label="Download Results",
+            data=f,
+            file_name=filename,
+            mime=SINKS[output_format].mime
+        )
+
+def render_job(job_id: str) -> None:
+    """Progress and the results so far, redrawn in place while the job runs"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        st.warning("This job is no longer available")
+        return
+
+    if job.running:
+        st.progress(job.done / job.total if job.total else 0.0)
+        last = f" — last: {job.last_query}" if job.last_query else ""
+        st.write(f"Job `{job.job_id}`: {job.done}/{job.total} rows in {job.elapsed:.0f}s{last}")
+        if st.button("Cancel"):
+            get_job_manager().cancel(job_id)
+        st.dataframe(job.to_dataframe())
+    elif not st.session_state.get(f"finished_{job_id}"):
+        # The fragment was polling; a full rerun stops the timer and shows the final state
+        st.session_state[f"finished_{job_id}"] = True
+        st.rerun(scope="app")
+    else:
+        render_finished(job)
 
 def main():
     st.title("🔍 Search Agent")
     st.write("Upload a CSV file with 'query' and 'search_type' columns to process")
-    
+
     # File uploader
     uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
-    
+
     if uploaded_file is not None:
         try:
             df = pd.read_csv(uploaded_file)
-            
+
             if 'query' not in df.columns or 'search_type' not in df.columns:
                 st.error("CSV must contain 'query' and 'search_type' columns")
                 return
-                
+
             st.write("Preview of input data:")
             st.dataframe(df.head())
-            
-            if st.button("Process Queries"):
-                st.session_state.processing = True
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                # Process data
-                start_time = time.time()
-                results_df = asyncio.run(process_with_progress(df, progress_bar))
-                end_time = time.time()
-                
-                # Save results
-                if not results_df.empty:
-                    filename = save_dataframe(results_df)
-                    
-                    st.success(f"Processing completed in {end_time - start_time:.2f} seconds!")
-                    st.write("Results preview:")
-                    st.dataframe(results_df)
-                    
-                    # Provide download link
-                    with open(filename, 'rb') as f:
-                        st.download_button(
-                            label="Download Results",
-                            data=f,
-                            file_name=filename,
-                            mime='text/csv'
-                        )
-                else:
-                    st.error("No results were generated")
-                
-                st.session_state.processing = False
-                
+
+            st.selectbox("Output format", list(SINKS), key="output_format")
+
+            current = get_job_manager().get(st.session_state.job_id)
+            busy = current is not None and current.running
+            if st.button("Process Queries", disabled=busy):
+                # Runs on the scraper service thread; this script returns at once and polls below
+                st.session_state.job_id = get_job_manager().submit(df)
+                st.query_params["job"] = st.session_state.job_id
+
         except Exception as e:
             st.error(f"Error processing file: {str(e)}")
 
+    job = get_job_manager().get(st.session_state.job_id)
+    if job is not None:
+        # Poll only while the job runs; finished jobs render once, statically
+        poll_every = 1.0 if job.running else None
+        st.fragment(run_every=poll_every)(render_job)(job.job_id)
+
 if __name__ == "__main__":
     main()
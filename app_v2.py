@@ -1,38 +1,106 @@
 import random
 import asyncio
+import functools
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from duckduckgo_search import DDGS
-from tools.new_tools import get_proxy_list
+from duckduckgo_search.exceptions import DuckDuckGoSearchException, RatelimitException
+from tools.proxy_pool import ProxyPool
+from tools.rate_limiter import HostRateLimiter, status_of
+from tools.retry import RetryPolicy
+from tools.metrics import METRICS
+from tools.llm_batch import MicroBatcher, build_batch_input, split_batch_response
+from tools.batch_runner import BatchRunner
+from tools.sinks import open_sink
+from tools.enrich import Enricher
+from tools.context import ContextBuilder, estimate_tokens
+from tools.cascade import CascadeStats, extraction_problems
+from tools.llm_router import (GROQ_TOKENS_PER_MINUTE, BackendCoolingDown, ChatBackend, LangChainBackend,
+                              LLMRouter, fallback_backends_from_env)
+from tools.cache import LLMCache, SearchCache, normalize_query
+from tools.records import SearchRecord
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_groq import ChatGroq
 from datetime import datetime
 import os
 
+logger = logging.getLogger(__name__)
 
 
 class SearchScraper:
-    def __init__(self):
-        self.sleep_times = [2, 3, 4, 5, 6]
+    def __init__(self, max_concurrent_searches: int = 4, max_concurrent_llm: int = 2,
+                 search_cache: Optional[SearchCache] = None, llm_cache: Optional[LLMCache] = None,
+                 proxy_pool: Optional[ProxyPool] = None, rate_limiter: Optional[HostRateLimiter] = None,
+                 llm_batch_size: int = 1, enrich_top_k: int = 0, enrich_deadline: float = 10.0,
+                 cascade: bool = False, small_model_name: str = "llama-3.1-8b-instant",
+                 llm_fallbacks: Optional[List[ChatBackend]] = None, llm_hedge_after: Optional[float] = 15.0,
+                 search_backend: Optional[Callable[[str, str, str], List[Dict]]] = None,
+                 llm_backend_factory: Optional[Callable[[str], List[ChatBackend]]] = None):
+        self.search_host = "duckduckgo.com"
+        self.llm_host = "api.groq.com"
+        # Start near the old 2-6 s pacing for DDG and let the limiter speed up while it stays healthy
+        self.rate_limiter = rate_limiter if rate_limiter is not None else HostRateLimiter(host_limits={
+            self.search_host: {"rate": 0.5, "burst": 1, "max_rate": 4.0},
+            self.llm_host: {"rate": 0.5, "burst": 4, "max_rate": 5.0},
+        })
         self.max_search_results = 3
-        self.proxies_list = get_proxy_list()
+        self.region = "wt-wt"
+        # Each retry goes out on a freshly acquired proxy; budgets restart with every process_dataframe
+        self.search_retry = RetryPolicy("search", max_attempts=3, base_delay=2.0, retry_on=(DuckDuckGoSearchException,))
+        # The LLM routers' only retry layer; they fail over between backends inside it
+        self.llm_retry = RetryPolicy("llm", max_attempts=3, base_delay=2.0, retry_on=(BackendCoolingDown,))
+        self.search_cache = search_cache if search_cache is not None else SearchCache()
+        self.max_concurrent_searches = max_concurrent_searches
+        self.max_concurrent_llm = max_concurrent_llm
+        # Duplicate rows skipped by process_dataframe over this scraper's lifetime
+        self.dedup_saved = 0
+        self._limits_loop = None
+        # llm_batch_size > 1 packs short queries of the same search_type into one LLM call
+        # (concurrent process_dataframe runs only)
+        self.llm_batch_size = llm_batch_size
+        self.batch_query_max_chars = 80
+        self.batch_context_tokens = 400
+        self.batch_linger = 2.0
+        self._batcher = None
+        self._batcher_loop = None
+        # enrich_top_k > 0 scrapes the best-ranked result pages before the LLM step
+        self.enricher = Enricher(top_k=enrich_top_k, deadline=enrich_deadline) if enrich_top_k > 0 else None
+        self.proxy_pool = proxy_pool if proxy_pool is not None else ProxyPool()
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.159 Safari/537.36",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Firefox/90.0",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/91.0.864.59"
         ]
-        self.ddgs = DDGS(timeout=20)
-        self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.0,
-            max_retries=2,
-            callbacks=[],
-            verbose=True,
-            api_key=os.getenv('GROQ_API_KEY')
-        )
-        print("LLM initialized successfully")
+        self.ddgs_timeout = 20
+        # Blocking (query, proxy_url, user_agent) -> results; DDGS unless a stand-in is injected (benchmarks)
+        self.search_backend = search_backend or self._search_sync
+        # DDGS is synchronous; searches run on this pool so they never block the event loop
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_searches, thread_name_prefix="ddgs")
+        self.model_name = "llama-3.3-70b-versatile"
+        self.llm_cache = llm_cache if llm_cache is not None else LLMCache()
+        self.context_builder = ContextBuilder(model=self.model_name)
+        # Groq first, then llm_fallbacks (or LLM_FALLBACK_BASE_URL) when Groq throttles or stalls
+        self.llm_fallbacks = llm_fallbacks
+        self.llm_hedge_after = llm_hedge_after
+        # llm_backend_factory(model) replaces Groq and the fallbacks entirely (offline benchmarks)
+        self.llm_backend_factory = llm_backend_factory
+        self.llm = self._build_llm(self.model_name)
+        # cascade=True asks the small model first and escalates to model_name only when
+        # its parsed answer fails the checks in tools.cascade
+        self.cascade = cascade
+        self.small_model_name = small_model_name
+        self.cascade_stats = CascadeStats()
+        self.small_context_builder = ContextBuilder(model=small_model_name)
+        self.small_llm = self._build_llm(small_model_name) if cascade else None
+        logger.info("LLM initialized successfully")
+        # Bump whenever prompt_templates change so cached completions are not reused
+        self.template_version = "1"
         self.prompt_templates = {
             "product": """You are a product search specialist tasked with extracting specific product information.
 
@@ -113,55 +181,86 @@ class SearchScraper:
             - No additional text or explanations
             - No empty fields - use "Not found" when needed"""
         }
-        print(f"Found {len(self.proxies_list)} proxies")
+        logger.info(f"Found {len(self.proxy_pool)} proxies")
 
-    async def search_with_proxy(self, query: str) -> List[Dict]:
-        proxy = random.choice(self.proxies_list)
-        proxy_url = f"socks5://{proxy['ip']}:{proxy['port']}"
-        user_agent = random.choice(self.user_agents)
-        print(f"\nUsing proxy {proxy_url}")
-        print(f"Searching for: {query}")
+    async def search_with_proxy(self, query: str, search_type: str = "product") -> List[Dict]:
+        cached = self.search_cache.get_results(query, self.max_search_results, self.region)
+        if cached is not None:
+            logger.debug(f"Cache hit for: {query}")
+            METRICS.inc("search_requests_total", outcome="cache_hit")
+            return cached
+
+        with METRICS.timer("search_seconds") as timing:
+            try:
+                results = await self.search_retry.call(self._search_attempt, query)
+            except Exception as e:
+                logger.warning(f"Search error for '{query}': {e}")
+                timing["status"] = "error"
+                METRICS.inc("search_requests_total", outcome="error")
+                return []
+
+        logger.debug(f"Found {len(results)} results")
+        METRICS.inc("search_requests_total", outcome="results" if results else "empty")
+        if results:
+            self.search_cache.set_results(query, search_type, self.max_search_results, self.region, results)
+        return results
 
-        self.ddgs.proxy = proxy_url
-        self.ddgs.headers = {"User-Agent": user_agent}
+    async def _search_attempt(self, query: str) -> List[Dict]:
+        with METRICS.timer("proxy_acquire_seconds"):
+            proxy = self.proxy_pool.acquire()
+        proxy_url = self.proxy_pool.url(proxy)
+        user_agent = random.choice(self.user_agents)
+        logger.debug(f"Searching for: {query} via {proxy_url}")
 
+        await self.rate_limiter.acquire(self.search_host)
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
         try:
-            results = list(self.ddgs.text(query, max_results=self.max_search_results))
-            print(f"Found {len(results)} results")
-            return results
+            with METRICS.timer("search_attempt_seconds"):
+                results = await loop.run_in_executor(
+                    self._executor,
+                    functools.partial(self.search_backend, query, proxy_url, user_agent)
+                )
         except Exception as e:
-            print(f"Search error: {e}")
-            return []
-        finally:
-            await asyncio.sleep(random.choice(self.sleep_times))
+            logger.info(f"Search attempt failed: {e}")
+            self.proxy_pool.report_failure(proxy)
+            # Dead proxies and dropped connections say nothing about DuckDuckGo's own limits
+            if self._search_host_error(e):
+                self.rate_limiter.report(self.search_host, error=e)
+            raise
+        self.proxy_pool.report_success(proxy, time.monotonic() - started)
+        self.rate_limiter.report(self.search_host)
+        return results
+
+    @staticmethod
+    def _search_host_error(error: BaseException) -> bool:
+        """Whether DuckDuckGo itself pushed back (rate limit, 429 or 5xx)"""
+        if isinstance(error, RatelimitException):
+            return True
+        status = status_of(error)
+        return status is not None and (status == 429 or status >= 500)
+
+    def _search_sync(self, query: str, proxy_url: str, user_agent: str) -> List[Dict]:
+        """Blocking DDGS call, run on the executor with its own client per call"""
+        ddgs = DDGS(headers={"User-Agent": user_agent}, proxy=proxy_url, timeout=self.ddgs_timeout)
+        return list(ddgs.text(query, region=self.region, max_results=self.max_search_results))
 
-    async def process_llm(self, query: str, search_type: str, search_results: pd.DataFrame) -> Optional[str]:
-        """Process search results with LLM"""
+    async def process_llm(self, query: str, search_type: str, search_results: List[SearchRecord],
+                          model: Optional[str] = None) -> Optional[str]:
+        """Process search results with LLM (model_name unless another model is given)"""
+        model = model or self.model_name
         try:
-            print("\n=== LLM Processing Start ===")
-            print(f"Processing query: {query}")
-            print(f"Search type: {search_type}")
-            
-            if not isinstance(search_results, pd.DataFrame):
-                print(f"Error: search_results is not a DataFrame, got {type(search_results)}")
-                return None
-                
-            if search_results.empty:
-                print("Error: Empty search results DataFrame")
+            logger.debug(f"LLM processing {search_type} query '{query}' with {model}")
+
+            if not search_results:
+                logger.warning("Empty search results")
                 return None
 
-            #Format search results for LLM
-            formatted_results = ""
-            for _, row in search_results.iterrows():
-                formatted_results += f"SOURCE: {row['url']}\n"
-                formatted_results += f"TITLE: {row['title']}\n"
-                formatted_results += f"DESCRIPTION: {row['description']}\n"
-                formatted_results += f"CONTENT: {row['body'][:1500]}...\n"
-                formatted_results += "-" * 80 + "\n\n"
+            formatted_results = self._context_builder_for(model).build(query, search_results)
 
-            print(f"\nFormatted {len(search_results)} results for LLM")
-            print("Sample of formatted content:")
-            print(formatted_results[:1500] + "..." if len(formatted_results) > 1500 else formatted_results)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Formatted {len(search_results)} results for LLM:\n"
+                             + (formatted_results[:1500] + "..." if len(formatted_results) > 1500 else formatted_results))
 
             template = self.prompt_templates.get(search_type, self.prompt_templates["product"])
             
@@ -178,36 +277,156 @@ class SearchScraper:
                 scratchpad=[]
             )
             
-            print("\nSending to LLM with formatted content...")
-            
-            try:
-                response = self.llm.invoke(messages)
-                print("\nRaw LLM Response:", response)
+            return await self._invoke_llm(messages, model)
                 
-                if hasattr(response, 'content'):
-                    content = response.content.strip()
-                    if content:
-                        return content
-                    else:
-                        print("Warning: Empty content from LLM")
-                        return None
+        except Exception as e:
+            logger.error(f"LLM processing error: {str(e)}", exc_info=logger.isEnabledFor(logging.DEBUG))
+            return None
+
+    def _build_llm(self, model: str) -> LLMRouter:
+        if self.llm_backend_factory is not None:
+            return LLMRouter(self.llm_backend_factory(model), rate_limiter=self.rate_limiter,
+                             hedge_after=self.llm_hedge_after, retry_policy=self.llm_retry)
+        groq = ChatGroq(
+            model=model,
+            temperature=0.0,
+            max_retries=0,  # the router fails over or retries after the Retry-After itself
+            callbacks=[],
+            verbose=True,
+            api_key=os.getenv('GROQ_API_KEY')
+        )
+        backends = [LangChainBackend("groq", groq, self.llm_host, max_concurrency=self.max_concurrent_llm,
+                                     tokens_per_minute=GROQ_TOKENS_PER_MINUTE.get(model))]
+        fallbacks = self.llm_fallbacks if self.llm_fallbacks is not None else fallback_backends_from_env(model)
+        return LLMRouter(backends + list(fallbacks), rate_limiter=self.rate_limiter,
+                         hedge_after=self.llm_hedge_after, retry_policy=self.llm_retry)
+
+    def _llm_for(self, model: str):
+        return self.small_llm if model == self.small_model_name and self.small_llm is not None else self.llm
+
+    def _context_builder_for(self, model: str) -> ContextBuilder:
+        return self.small_context_builder if model == self.small_model_name else self.context_builder
+
+    async def _invoke_llm(self, messages: List[BaseMessage], model: Optional[str] = None) -> Optional[str]:
+        """Cached, rate-limited LLM call returning the stripped completion text"""
+        model = model or self.model_name
+        cache_key = self.llm_cache.make_key(
+            model, self.template_version, [message.content for message in messages]
+        )
+        cached = self.llm_cache.get_completion(cache_key)
+        if cached is not None:
+            logger.debug("LLM cache hit")
+            METRICS.inc("llm_requests_total", model=model, outcome="cache_hit")
+            return cached
+
+        try:
+            response = await self._call_llm(model, messages)
+            logger.debug(f"Raw LLM Response: {response}")
+            
+            if hasattr(response, 'content'):
+                self._count_tokens(model, messages, response)
+                content = response.content.strip()
+                if content:
+                    METRICS.inc("llm_requests_total", model=model, outcome="ok")
+                    self.llm_cache.set_completion(cache_key, content)
+                    return content
                 else:
-                    print(f"Error: Unexpected response format: {type(response)}")
+                    logger.warning("Empty content from LLM")
+                    METRICS.inc("llm_requests_total", model=model, outcome="empty")
                     return None
-                    
-            except Exception as llm_error:
-                print(f"LLM invocation error: {str(llm_error)}")
-                import traceback
-                print("LLM Traceback:", traceback.format_exc())
+            else:
+                logger.error(f"Unexpected response format: {type(response)}")
+                METRICS.inc("llm_requests_total", model=model, outcome="error")
                 return None
                 
-        except Exception as e:
-            print(f"LLM processing error: {str(e)}")
-            import traceback
-            print("Process LLM Traceback:", traceback.format_exc())
+        except Exception as llm_error:
+            logger.error(f"LLM invocation error: {str(llm_error)}", exc_info=logger.isEnabledFor(logging.DEBUG))
+            METRICS.inc("llm_requests_total", model=model, outcome="error")
             return None
-        finally:
-            print("=== LLM Processing End ===\n")
+
+    @staticmethod
+    def _count_tokens(model: str, messages: List[BaseMessage], response) -> None:
+        """Provider-reported token usage when available, else the ContextBuilder estimate"""
+        usage = getattr(response, 'usage_metadata', None) or {}
+        prompt_tokens = usage.get('input_tokens')
+        if prompt_tokens is None:
+            prompt_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        completion_tokens = usage.get('output_tokens')
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(str(response.content))
+        METRICS.inc("llm_prompt_tokens_total", prompt_tokens, model=model)
+        METRICS.inc("llm_completion_tokens_total", completion_tokens, model=model)
+
+    async def _call_llm(self, model: str, messages: List[BaseMessage]):
+        # The router paces, retries and fails over between its backends itself
+        with METRICS.timer("llm_call_seconds", model=model):
+            return await self._llm_for(model).ainvoke(messages)
+
+    async def process_llm_batch(self, search_type: str, items: List[Tuple[str, List[SearchRecord]]],
+                                model: Optional[str] = None) -> List[Optional[str]]:
+        """Extract several queries of one search_type with a single LLM call.
+        Entries the model did not answer come back as None."""
+        model = model or self.model_name
+        logger.debug(f"LLM batch of {len(items)} {search_type} queries ({model})")
+        template = self.prompt_templates.get(search_type, self.prompt_templates["product"])
+        builder = self._context_builder_for(model)
+        batch_input = build_batch_input(
+            [query for query, _ in items],
+            [builder.build(query, results, token_budget=self.batch_context_tokens)
+             for query, results in items]
+        )
+        messages = [SystemMessage(content=template), HumanMessage(content=batch_input)]
+        response = await self._invoke_llm(messages, model)
+        return split_batch_response(response, len(items))
+
+    def _get_batcher(self) -> MicroBatcher:
+        loop = asyncio.get_running_loop()
+        if self._batcher_loop is not loop:
+            self._batcher = MicroBatcher(self._flush_llm_batch, self.llm_batch_size, self.batch_linger)
+            self._batcher_loop = loop
+        return self._batcher
+
+    async def _flush_llm_batch(self, key: Tuple[str, str],
+                               items: List[Tuple[str, List[SearchRecord]]]) -> List[Optional[str]]:
+        search_type, model = key
+        _, llm_semaphore = self._get_semaphores()
+        if len(items) == 1:
+            query, results = items[0]
+            async with llm_semaphore:
+                return [await self.process_llm(query, search_type, results, model)]
+
+        async with llm_semaphore:
+            answers = await self.process_llm_batch(search_type, items, model)
+        # Fall back to one call per query for anything the batch answer missed
+        for position, answer in enumerate(answers):
+            if answer is None:
+                query, results = items[position]
+                async with llm_semaphore:
+                    answers[position] = await self.process_llm(query, search_type, results, model)
+        return answers
+
+    async def _extract_with(self, model: str, query: str, search_type: str,
+                            search_results: List[SearchRecord], batch: bool = False) -> Optional[str]:
+        if batch and self.llm_batch_size > 1 and len(query) <= self.batch_query_max_chars:
+            return await self._get_batcher().submit((search_type, model), (query, search_results))
+        _, llm_semaphore = self._get_semaphores()
+        async with llm_semaphore:
+            return await self.process_llm(query, search_type, search_results, model)
+
+    async def _extract(self, query: str, search_type: str, search_results: List[SearchRecord],
+                       batch: bool = False) -> Optional[str]:
+        if not self.cascade:
+            return await self._extract_with(self.model_name, query, search_type, search_results, batch)
+
+        response = await self._extract_with(self.small_model_name, query, search_type, search_results, batch)
+        problems = extraction_problems(response, self.parse_llm_response(response, search_type), search_type)
+        self.cascade_stats.record(problems)
+        if not problems:
+            return response
+        logger.info(f"Escalating '{query}' to {self.model_name}: {', '.join(problems)}")
+        METRICS.inc("llm_escalations_total", search_type=search_type)
+        escalated = await self._extract_with(self.model_name, query, search_type, search_results, batch)
+        return escalated or response
 
     def parse_llm_response(self, response: str, search_type: str) -> Dict:
         if not response:
@@ -239,82 +458,158 @@ class SearchScraper:
             }
         return {}
 
-    async def process_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        all_results = []
-        
-        for index, row in df.iterrows():
-            print(f"\n{'='*50}")
-            print(f"Processing row {index + 1}/{len(df)}")
-            print(f"Query: {row['query']}")
-            print(f"Search type: {row['search_type']}")
-            
-            try:
-                search_results = await self.search_with_proxy(row['query'])
-                print(f"\nSearch results type: {type(search_results)}")
-                print(f"Search results count: {len(search_results) if search_results else 0}")
-                
-                if search_results:
-                    ddg_results = []
-                    for result in search_results:
-                        ddg_data = {
-                            'url': result.get('link') or result.get('href', ''),
-                            'title': result.get('title', 'No title'),
-                            'description': result.get('snippet', 'No description'),
-                            'body': f"{result.get('body', '')} - {result.get('snippet', '')}",
-                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            'method': 'duckduckgo'
-                        }
-                        ddg_results.append(ddg_data)
-                    
-                    combined_results = pd.DataFrame(ddg_results)
-                                        
-                    if not combined_results.empty:
-                        print(f"\nCombined data shape: {combined_results.shape}")
-                        print("Sources:", combined_results['method'].value_counts().to_dict())
-                        
-
-                        print("\nSending combined results to LLM...")
-                        llm_response = await self.process_llm(row['query'], row['search_type'], combined_results)
-                        print("\nLLM Response received:", llm_response)
-                        
-                        if llm_response:
-                            parsed_response = self.parse_llm_response(llm_response, row['search_type'])
-                            print("\nParsed Response:", parsed_response)
-                            
-                            # Combine original query with LLM results
-                            result = {
-                                'original_query': row['query'],
-                                'search_type': row['search_type'],
-                                **parsed_response
-                            }
-                            all_results.append(result)
-                            print(f"\nAdded result for query: {row['query']}")
-                        else:
-                            result = self._create_default_response(row, 'llm_failed', combined_results)
-                            all_results.append(result)
-                    else:
-                        result = self._create_default_response(row, 'no_data')
-                        all_results.append(result)
-                else:
-                    result = self._create_default_response(row, 'no_results')
-                    all_results.append(result)
-                
-            except Exception as e:
-                print(f"Error processing row {index}: {str(e)}")
-                result = self._create_default_response(row, 'error')
-                all_results.append(result)
-                continue
-        
+    def _get_semaphores(self):
+        """Lazily bind the search/LLM concurrency limits to the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._limits_loop is not loop:
+            self._search_semaphore = asyncio.Semaphore(self.max_concurrent_searches)
+            self._llm_semaphore = asyncio.Semaphore(self.max_concurrent_llm)
+            self._limits_loop = loop
+        return self._search_semaphore, self._llm_semaphore
+
+    async def _process_row(self, position: int, row: Dict, total: int, batch: bool = False) -> Dict:
+        with METRICS.timer("row_seconds") as timing:
+            result, status = await self._run_row(position, row, total, batch)
+            timing["status"] = status
+        METRICS.inc("rows_total", status=status, search_type=row['search_type'])
+        return result
+
+    async def _run_row(self, position: int, row: Dict, total: int, batch: bool = False) -> Tuple[Dict, str]:
+        """(result row, status) where status is ok, no_results, no_data, llm_failed or error"""
+        search_semaphore, _ = self._get_semaphores()
+        logger.info(f"Processing row {position + 1}/{total}: {row['query']} ({row['search_type']})")
+
+        try:
+            async with search_semaphore:
+                search_results = await self.search_with_proxy(row['query'], row['search_type'])
+            logger.debug(f"Search results count: {len(search_results) if search_results else 0}")
+
+            if not search_results:
+                return self._create_default_response(row, 'no_results'), 'no_results'
+
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            records = [SearchRecord.from_ddg(result, timestamp) for result in search_results]
+
+            if self.enricher is not None:
+                try:
+                    with METRICS.timer("enrich_seconds"):
+                        records = await self.enricher.enrich(row['query'], row['search_type'], records)
+                except Exception as scrape_error:
+                    logger.warning(f"Scraping failed: {str(scrape_error)}")
+
+            if not records:
+                return self._create_default_response(row, 'no_data'), 'no_data'
+
+            logger.debug(f"Combined results: {len(records)}, sources: "
+                         f"{dict(Counter(record.method for record in records))}")
+
+            llm_response = await self._extract(row['query'], row['search_type'], records, batch)
+            logger.debug(f"LLM Response received: {llm_response}")
+
+            if not llm_response:
+                return self._create_default_response(row, 'llm_failed', records), 'llm_failed'
+
+            with METRICS.timer("parse_seconds"):
+                parsed_response = self.parse_llm_response(llm_response, row['search_type'])
+            logger.debug(f"Parsed Response: {parsed_response}")
+
+            # Combine original query with LLM results
+            return {
+                'original_query': row['query'],
+                'search_type': row['search_type'],
+                **parsed_response
+            }, 'ok'
+
+        except Exception as e:
+            logger.error(f"Error processing row {position + 1}: {str(e)}")
+            return self._create_default_response(row, 'error'), 'error'
+
+    async def process_dataframe(self, df: pd.DataFrame, concurrent: bool = False,
+                                progress_callback: Optional[Callable[[int, int, Dict], None]] = None,
+                                result_callback: Optional[Callable[[int, Dict], None]] = None) -> pd.DataFrame:
+        """Process every row; with concurrent=True rows run in parallel, bounded by
+        max_concurrent_searches / max_concurrent_llm. Output order always matches input.
+        progress_callback(done, total, row) is called on the event loop as each row finishes,
+        and result_callback(position, result) with its output row (position in the input).
+        Rows whose query differs only in case/whitespace (same search_type) are searched and
+        extracted once, and the answer is copied to every one of them. Each call starts with
+        fresh retry budgets."""
+        self.reset_retry_budgets()
+        total = len(df)
+        # Plain dicts instead of iterrows(): no per-row Series, and the only DataFrame built is the output
+        rows = df.to_dict('records')
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for position, row in enumerate(rows):
+            groups.setdefault((normalize_query(row['query']), row['search_type']), []).append(position)
+        saved = total - len(groups)
+        self.dedup_saved += saved
+        if saved:
+            logger.info(f"Deduplicated {total} rows to {len(groups)} unique queries "
+                        f"({saved} searches and LLM calls saved)")
+            METRICS.inc("rows_deduplicated_total", saved)
+
+        all_results: List[Optional[Dict]] = [None] * total
+        done = 0
+
+        async def run_group(positions: List[int]):
+            nonlocal done
+            # Logged as the first duplicate's position among all input rows. Rows run one at
+            # a time are never batched: each would wait out batch_linger alone.
+            result = await self._process_row(positions[0], rows[positions[0]], total, batch=concurrent)
+            for position in positions:
+                all_results[position] = {**result, 'original_query': rows[position]['query']}
+                if result_callback:
+                    result_callback(position, all_results[position])
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total, rows[position])
+
+        if concurrent:
+            await asyncio.gather(*(run_group(positions) for positions in groups.values()))
+        else:
+            for positions in groups.values():
+                await run_group(positions)
+
         if all_results:
-            final_df = pd.DataFrame(all_results)
-            print("\nFinal DataFrame columns:", final_df.columns.tolist())
-            print("\nNumber of results:", len(final_df))
+            final_df = pd.DataFrame(list(all_results))
+            logger.debug(f"Final DataFrame columns: {final_df.columns.tolist()}")
+            logger.info(f"Number of results: {len(final_df)}")
             return final_df
         
-        print("No results to create DataFrame")
+        logger.warning("No results to create DataFrame")
         return pd.DataFrame()
 
-    def _create_default_response(self, row: pd.Series, status: str, data: pd.DataFrame = None) -> Dict:
+    def reset_retry_budgets(self) -> None:
+        """Start a fresh retry budget, so one bad batch cannot use up a long-lived scraper's retries"""
+        self.search_retry.reset()
+        self.llm_retry.reset()
+        if self.enricher is not None:
+            self.enricher.scraper.retry_policy.reset()
+
+    async def aclose(self) -> None:
+        """close() plus the enricher's and LLM backends' HTTP clients, which must be closed on their event loop"""
+        if self.enricher is not None:
+            await self.enricher.close()
+        for llm in (self.llm, self.small_llm):
+            if isinstance(llm, LLMRouter):
+                await llm.close()
+        self.close()
+
+    def close(self) -> None:
+        """Release the search thread pool"""
+        self._executor.shutdown(wait=False)
+        self.proxy_pool.close()
+        logger.info(f"Search cache: {self.search_cache.stats()}")
+        logger.info(f"LLM cache: {self.llm_cache.stats()}")
+        logger.info(f"Duplicate rows deduplicated: {self.dedup_saved}")
+        logger.info(f"Search retries: {self.search_retry.stats()}")
+        logger.info(f"LLM retries: {self.llm_retry.stats()}")
+        if self.cascade:
+            logger.info(f"Model cascade: {self.cascade_stats.summary()}")
+        if isinstance(self.llm, LLMRouter):
+            logger.info(f"LLM backends: {self.llm.snapshot()}")
+
+    def _create_default_response(self, row: Dict, status: str, data: Optional[List[SearchRecord]] = None) -> Dict:
         """Helper method to create default responses"""
         response = {
             'original_query': row['query'],
@@ -336,21 +631,30 @@ class SearchScraper:
         return response
 
 async def main():
-    # Test DataFrame
-    df = pd.read_csv("search_data.csv")
-    
+    # LOG_LEVEL=DEBUG brings back full prompts and raw LLM responses
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(),
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if os.getenv("METRICS_PORT"):
+        METRICS.serve(int(os.getenv("METRICS_PORT")))
+
+    # Streams search_data.csv in chunks; rerunning after a crash resumes from the checkpoint.
+    # Each run's rows also go to a typed file (OUTPUT_FORMAT=parquet, arrow or csv) for loading.
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_format = os.getenv("OUTPUT_FORMAT", "parquet").lower()
+    sink = open_sink(f"search_results_{timestamp}.{output_format}", output_format)
     scraper = SearchScraper()
-    result_df = await scraper.process_dataframe(df)
-    
-    if not result_df.empty:
-        print("\nFinal Results:")
-        print(result_df)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        result_df.to_csv(f'search_results_{timestamp}.csv', index=False)
-        print(f"\nResults saved to search_results_{timestamp}.csv")
-    else:
-        print("\nNo results found")
+    runner = BatchRunner(scraper, "search_data.csv", "search_results.jsonl", chunk_size=50, sink=sink)
+    try:
+        stats = await runner.run()
+    finally:
+        sink.close()
+        await scraper.aclose()
+
+    print(f"\nProcessed {stats['processed']} rows, skipped {stats['skipped']} already done")
+    print(f"Results saved to {runner.output_path}")
+    print(f"This run's rows saved to {sink.path}")
+    METRICS.write_json("search_metrics.json")
+    print("Run metrics saved to search_metrics.json")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
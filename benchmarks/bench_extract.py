@@ -0,0 +1,84 @@
+"""Compare HTML extraction backends on the saved fixtures.
+
+    python -m benchmarks.bench_extract [--repeat 20]
+
+"current-*" rows reproduce the BeautifulSoup code WebScraper and JinaSpider used
+before tools.extract existed; the others are the pluggable backends.
+"""
+import argparse
+import glob
+import html
+import os
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from tools.extract import CHROME_TAGS, EXTRACTORS, get_extractor
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _clean_text(text):
+    return re.sub(r'\s+', ' ', html.unescape(text)).strip() if text else ""
+
+
+def current_webscraper(markup):
+    soup = BeautifulSoup(markup, "html.parser")
+    title = _clean_text(soup.title.text) if soup.title else ""
+    description = soup.find("meta", {"name": ["description", "Description"]})
+    if not description:
+        description = soup.find("meta", {"property": "og:description"})
+    description = _clean_text(description["content"]) if description else ""
+    body = _clean_text(soup.body.get_text(" ")) if soup.body else ""
+    return title, description, body[:1000]
+
+
+def current_jina(markup):
+    soup = BeautifulSoup(markup, 'html.parser')
+    title = soup.title.string if soup.title else "No title"
+    for element in soup(['script', 'style', 'meta', 'link', 'footer', 'nav', 'aside']):
+        element.decompose()
+    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
+    if main_content:
+        text_content = ' '.join(main_content.stripped_strings)
+    else:
+        text_content = ' '.join(soup.body.stripped_strings if soup.body else soup.stripped_strings)
+    return title, text_content[:2000]
+
+
+def timed(fn, markup, repeat):
+    fn(markup)  # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(markup)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    candidates = {
+        "current-webscraper": current_webscraper,
+        "current-jina": current_jina,
+    }
+    for name in EXTRACTORS:
+        extractor = get_extractor(name)
+        candidates[f"{name}-webscraper"] = lambda m, e=extractor: e.extract(m, budget=1000)
+        candidates[f"{name}-jina"] = lambda m, e=extractor: e.extract(m, budget=2500, skip_tags=CHROME_TAGS,
+                                                                      main_content=True)
+
+    print(f"{'fixture':<20}{'size KB':>9}  {'path':<22}{'ms/page':>10}")
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            markup = f.read()
+        fixture = os.path.basename(path)
+        for name, fn in candidates.items():
+            ms = timed(fn, markup, args.repeat)
+            print(f"{fixture:<20}{len(markup) / 1024:>9.1f}  {name:<22}{ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
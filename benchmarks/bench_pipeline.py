@@ -0,0 +1,189 @@
+"""Offline throughput benchmark for SearchScraper, WebScraper and run_spider.
+
+    python -m benchmarks.bench_pipeline [--rows 200] [--pages 100] [--stages pipeline,scrape,spider]
+                                        [--llm-latency 0.3] [--llm-error-rate 0.05]
+
+DuckDuckGo, Groq and the scraped sites are replaced by benchmarks.stubs running in a
+child process, so nothing leaves the machine. Reports rows/s, p50/p95 per-item latency
+and the process's peak RSS after each stage (peak RSS only ever grows, so later stages
+include earlier ones; run a single stage to isolate it).
+"""
+import argparse
+import asyncio
+import resource
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+import requests
+
+from app_v2 import SearchScraper
+from benchmarks.stubs import StubConfig, StubServer
+from tools.cache import LLMCache, SearchCache
+from tools.llm_router import OpenAICompatibleBackend
+from tools.proxy_pool import ProxyPool
+from tools.rate_limiter import HostRateLimiter
+from tools.scrape import WebScraper
+from tools.tools import run_spider
+
+QUERY_WORDS = ["cordless drill", "paris", "acme corp", "garden hose", "tokyo", "globex", "led bulb", "berlin"]
+SEARCH_TYPES = ["product", "location", "company"]
+
+
+def _unthrottled() -> HostRateLimiter:
+    # The stubs are all on 127.0.0.1; production pacing would only measure the limiter
+    return HostRateLimiter(default_rate=1000, default_burst=1000, max_rate=10000)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(q * 100) - 1]
+
+
+def _report(stage: str, items: int, elapsed: float, latencies: List[float]) -> Dict:
+    result = {
+        "stage": stage,
+        "items": items,
+        "seconds": elapsed,
+        "items_per_s": items / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 0.50),
+        "p95_ms": _percentile(latencies, 0.95),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    p50 = f"{result['p50_ms']:.1f}" if result["p50_ms"] is not None else "n/a"
+    p95 = f"{result['p95_ms']:.1f}" if result["p95_ms"] is not None else "n/a"
+    print(f"{stage:<10}{items:>7}{elapsed:>9.2f}{result['items_per_s']:>10.1f}{p50:>10}{p95:>10}"
+          f"{result['peak_rss_mb']:>10.1f}")
+    return result
+
+
+class _TimedScraper(SearchScraper):
+    """Records each row's wall time"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+
+    async def _process_row(self, position, row, total, batch=False):
+        started = time.perf_counter()
+        try:
+            return await super()._process_row(position, row, total, batch)
+        finally:
+            self.latencies.append((time.perf_counter() - started) * 1000)
+
+
+def bench_pipeline(base_url: str, rows: int, concurrency: int, llm_batch_size: int) -> Dict:
+    session = requests.Session()
+
+    def search_stub(query: str, proxy_url: str, user_agent: str) -> List[Dict]:
+        response = session.get(f"{base_url}/search", params={"q": query}, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    scraper = _TimedScraper(
+        max_concurrent_searches=concurrency,
+        max_concurrent_llm=concurrency,
+        search_cache=SearchCache(path=f"{cache_dir}/search.sqlite"),
+        llm_cache=LLMCache(path=f"{cache_dir}/llm.sqlite"),
+        proxy_pool=ProxyPool(proxies=[{"ip": "127.0.0.1", "port": 9}]),
+        rate_limiter=_unthrottled(),
+        llm_batch_size=llm_batch_size,
+        search_backend=search_stub,
+        llm_backend_factory=lambda model: [OpenAICompatibleBackend(
+            "stub", f"{base_url}/v1", model, max_concurrency=concurrency)],
+    )
+    # Unique queries, so neither the caches nor the dedup pre-pass hide any work
+    df = pd.DataFrame({
+        "query": [f"{QUERY_WORDS[i % len(QUERY_WORDS)]} {i}" for i in range(rows)],
+        "search_type": [SEARCH_TYPES[i % len(SEARCH_TYPES)] for i in range(rows)],
+    })
+
+    async def run():
+        try:
+            return await scraper.process_dataframe(df, concurrent=True)
+        finally:
+            await scraper.aclose()
+
+    started = time.perf_counter()
+    result_df = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    failed = int((result_df.get("product_name") == "Error").sum()) if "product_name" in result_df else 0
+    if failed:
+        print(f"  ({failed} rows ended in error)")
+    return _report("pipeline", rows, elapsed, scraper.latencies)
+
+
+def bench_scrape(base_url: str, pages: int) -> Dict:
+    scraper = WebScraper(timeout=10, max_retries=2, rate_limiter=_unthrottled())
+    latencies: List[float] = []
+    fetch = scraper._get_content_requests
+
+    def timed_fetch(url):
+        started = time.perf_counter()
+        try:
+            return fetch(url)
+        finally:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    scraper._get_content_requests = timed_fetch
+    urls = [f"{base_url}/pages/{i}.html" for i in range(pages)]
+    started = time.perf_counter()
+    scraper.scrape(urls)
+    return _report("scrape", pages, time.perf_counter() - started, latencies)
+
+
+def bench_spider(base_url: str, pages: int) -> Dict:
+    # Real crawls spread over many domains; the stub is one host, so lift the per-domain cap
+    settings = {"CONCURRENT_REQUESTS_PER_DOMAIN": 32, "AUTOTHROTTLE_ENABLED": False}
+    urls = [f"{base_url}/pages/{i}.html" for i in range(pages)]
+    seconds: List[float] = []
+    started = time.perf_counter()
+    items = run_spider(urls, settings=settings, timings=seconds)
+    elapsed = time.perf_counter() - started
+    if len(items) != pages:
+        print(f"  (spider returned {len(items)}/{pages} items)")
+    return _report("spider", pages, elapsed, [value * 1000 for value in seconds])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--stages", default="pipeline,scrape,spider")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-batch-size", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--search-latency", type=float, default=StubConfig.search_latency)
+    parser.add_argument("--llm-latency", type=float, default=StubConfig.llm_latency)
+    parser.add_argument("--llm-error-rate", type=float, default=StubConfig.llm_error_rate)
+    parser.add_argument("--page-latency", type=float, default=StubConfig.page_latency)
+    args = parser.parse_args()
+
+    config = StubConfig(search_latency=args.search_latency, llm_latency=args.llm_latency,
+                        llm_error_rate=args.llm_error_rate, page_latency=args.page_latency)
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    with StubServer(args.port, config) as stub:
+        print(f"{'stage':<10}{'items':>7}{'seconds':>9}{'items/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'RSS MB':>10}")
+        for stage in stages:
+            if stage == "pipeline":
+                bench_pipeline(stub.base_url, args.rows, args.concurrency, args.llm_batch_size)
+            elif stage == "scrape":
+                bench_scrape(stub.base_url, args.pages)
+            elif stage == "spider":
+                bench_spider(stub.base_url, args.pages)
+            else:
+                parser.error(f"Unknown stage '{stage}'")
+
+
+if __name__ == "__main__":
+    main()
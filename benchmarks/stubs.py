@@ -0,0 +1,160 @@
+"""Local stand-ins for DuckDuckGo, Groq and target sites, for offline benchmarks.
+
+    python -m benchmarks.stubs [--port 8900] [--llm-latency 0.3] [--llm-error-rate 0.05]
+
+GET  /search?q=...           DDG-like JSON results (title/href/body) linking to /pages/
+POST /v1/chat/completions    OpenAI-compatible chat answers in the <||> format, one numbered
+                             line per query for multi-query batch prompts
+GET  /pages/<n>.html         the HTML fixtures in benchmarks/fixtures, cycled
+"""
+import argparse
+import asyncio
+import glob
+import multiprocessing
+import os
+import random
+import re
+import time
+import zlib
+from dataclasses import dataclass
+
+import requests
+from aiohttp import web
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Field layout of each prompt template's answer, recognised from the system prompt
+_ANSWERS = {
+    "Location Name<||>": "{query}<||>City<||>Testland<||>1,234,567<||>789 km²",
+    "Company Name<||>": "{query} Inc.<||>Software<||>$1.2 billion (2024)<||>Springfield, USA",
+}
+_PRODUCT_ANSWER = "{query}<||>Tools<||>$129.99<||>{url}"
+# "QUERY 3: cordless drill 7" lines of tools.llm_batch.build_batch_input
+_BATCH_QUERY = re.compile(r"^QUERY (\d+): (.*)$", re.M)
+
+
+@dataclass
+class StubConfig:
+    search_latency: float = 0.05
+    results_per_query: int = 3
+    llm_latency: float = 0.3
+    llm_jitter: float = 0.1
+    llm_error_rate: float = 0.0
+    page_latency: float = 0.02
+
+
+def _load_corpus():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def build_app(config: StubConfig) -> web.Application:
+    corpus = _load_corpus()
+
+    async def search(request):
+        await asyncio.sleep(config.search_latency)
+        query = request.query.get("q", "")
+        base = f"{request.scheme}://{request.host}"
+        seed = zlib.crc32(query.encode("utf-8"))
+        results = [
+            {
+                "title": f"{query} - result {rank}",
+                "href": f"{base}/pages/{(seed + rank) % 1000}.html",
+                "body": f"Details, price and reviews for {query}. Result {rank} of {config.results_per_query}.",
+            }
+            for rank in range(config.results_per_query)
+        ]
+        return web.json_response(results)
+
+    async def chat(request):
+        payload = await request.json()
+        await asyncio.sleep(max(0.0, random.gauss(config.llm_latency, config.llm_jitter)))
+        if random.random() < config.llm_error_rate:
+            if random.random() < 0.5:
+                return web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": "1"})
+            return web.json_response({"error": "upstream error"}, status=500)
+
+        system = payload["messages"][0]["content"]
+        human = payload["messages"][-1]["content"]
+        template = next((answer for marker, answer in _ANSWERS.items() if marker in system), _PRODUCT_ANSWER)
+        url = f"{request.scheme}://{request.host}/pages/0.html"
+        batch = _BATCH_QUERY.findall(human)
+        if batch:
+            content = "\n".join(f"{number}. {template.format(query=query.strip(), url=url)}" for number, query in batch)
+        else:
+            content = template.format(query=human.split("\n", 1)[0].strip(), url=url)
+        prompt_tokens = sum(len(message["content"]) for message in payload["messages"]) // 4
+        return web.json_response({
+            "id": "stub",
+            "object": "chat.completion",
+            "model": payload.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_tokens + len(content) // 4},
+        })
+
+    async def page(request):
+        await asyncio.sleep(config.page_latency)
+        number = int(request.match_info["number"])
+        return web.Response(body=corpus[number % len(corpus)], content_type="text/html", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/search", search)
+    app.router.add_post("/v1/chat/completions", chat)
+    app.router.add_get("/pages/{number:\\d+}.html", page)
+    return app
+
+
+def serve(port: int, config: StubConfig) -> None:
+    web.run_app(build_app(config), host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+class StubServer:
+    """Runs the stubs in a child process so they do not share the benchmark's CPU or RSS"""
+
+    def __init__(self, port: int = 8900, config: StubConfig = None):
+        self.port = port
+        self.config = config or StubConfig()
+        self.base_url = f"http://127.0.0.1:{port}"
+        self._process = None
+
+    def __enter__(self) -> "StubServer":
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=serve, args=(self.port, self.config), daemon=True
+        )
+        self._process.start()
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            try:
+                requests.get(f"{self.base_url}/search", params={"q": "ping"}, timeout=1)
+                return self
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError(f"Stub server did not start on port {self.port}")
+
+    def __exit__(self, *exc) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(5)
+            self._process = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--search-latency", type=float, default=StubConfig.search_latency)
+    parser.add_argument("--llm-latency", type=float, default=StubConfig.llm_latency)
+    parser.add_argument("--llm-error-rate", type=float, default=StubConfig.llm_error_rate)
+    parser.add_argument("--page-latency", type=float, default=StubConfig.page_latency)
+    args = parser.parse_args()
+    print(f"Serving stubs on http://127.0.0.1:{args.port}")
+    serve(args.port, StubConfig(search_latency=args.search_latency, llm_latency=args.llm_latency,
+                                llm_error_rate=args.llm_error_rate, page_latency=args.page_latency))
+
+
+if __name__ == "__main__":
+    main()
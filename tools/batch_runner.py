@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+from typing import Dict, Optional, Set
+
+import pandas as pd
+
+from tools.sinks import ResultSink
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRunner:
+    """Streams an input CSV through ``scraper.process_dataframe`` chunk by chunk and appends
+    each finished chunk to a JSONL checkpoint. Every output line carries the input ``row_id``
+    (its 0-based position in the CSV), so a restarted run skips rows that are already done.
+    An optional ``sink`` also receives each finished chunk (e.g. typed Parquet for loading);
+    it only holds this run's rows, the JSONL checkpoint stays the complete record."""
+
+    def __init__(self, scraper, input_path: str, output_path: str, chunk_size: int = 50, concurrent: bool = True,
+                 sink: Optional[ResultSink] = None):
+        self.scraper = scraper
+        self.input_path = input_path
+        self.output_path = output_path
+        self.chunk_size = chunk_size
+        self.concurrent = concurrent
+        self.sink = sink
+
+    def completed_ids(self) -> Set[int]:
+        done = set()
+        if not os.path.exists(self.output_path):
+            return done
+        with open(self.output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(int(json.loads(line)["row_id"]))
+                except (ValueError, KeyError, TypeError):
+                    # Torn last line from a crash; that row simply runs again
+                    continue
+        return done
+
+    def _repair_tail(self) -> None:
+        """Make sure new lines don't get glued onto a partially written one"""
+        if not os.path.exists(self.output_path) or os.path.getsize(self.output_path) == 0:
+            return
+        with open(self.output_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def _append(self, results: pd.DataFrame) -> None:
+        with open(self.output_path, "a", encoding="utf-8") as f:
+            # Columns of other search_types are NaN in a mixed chunk; write them as null, not bare NaN
+            records = results.astype(object).where(results.notna(), None).to_dict("records")
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str, allow_nan=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def run(self) -> Dict[str, int]:
+        done = self.completed_ids()
+        self._repair_tail()
+        stats = {"skipped": 0, "processed": 0}
+
+        for chunk in pd.read_csv(self.input_path, chunksize=self.chunk_size):
+            todo = chunk[~chunk.index.isin(done)]
+            stats["skipped"] += len(chunk) - len(todo)
+            if todo.empty:
+                continue
+
+            results = await self.scraper.process_dataframe(todo, concurrent=self.concurrent)
+            if results.empty:
+                continue
+            # process_dataframe keeps input order, so rows line up with todo positionally
+            results.insert(0, "row_id", todo.index.to_list())
+            self._append(results)
+            if self.sink is not None:
+                self.sink.write(results.to_dict("records"))
+            stats["processed"] += len(results)
+            logger.info(f"Checkpointed {stats['processed']} rows ({stats['skipped']} already done)")
+
+        return stats
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share a key"""
+    return " ".join(str(query).lower().split())
+
+
+class SQLiteCache:
+    """Small persistent key/value store with per-entry TTL, LRU eviction and hit/miss counters"""
+
+    def __init__(self, path: str, table: str, max_entries: int = 50000, default_ttl: float = 86400):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_lru ON {self.table} (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> str:
+        """Content address for a tuple of key parts"""
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SearchCache(SQLiteCache):
+    """DuckDuckGo results keyed on normalized query, max_results and region"""
+
+    DEFAULT_TTLS = {
+        "product": 6 * 3600,        # prices move
+        "company": 7 * 86400,
+        "location": 30 * 86400,
+    }
+
+    def __init__(self, path: str = "cache/search_cache.sqlite", ttls: Optional[Dict[str, float]] = None,
+                 max_entries: int = 50000, default_ttl: float = 86400):
+        super().__init__(path, "search_results", max_entries=max_entries, default_ttl=default_ttl)
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+
+    def make_key(self, query: str, max_results: int, region: str) -> str:
+        return self.fingerprint(normalize_query(query), max_results, region)
+
+    def get_results(self, query: str, max_results: int, region: str) -> Optional[List[Dict]]:
+        return self.get(self.make_key(query, max_results, region))
+
+    def set_results(self, query: str, search_type: str, max_results: int, region: str, results: List[Dict]) -> None:
+        ttl = self.ttls.get(search_type, self.default_ttl)
+        self.set(self.make_key(query, max_results, region), results, ttl=ttl)
+
+
+class LLMCache(SQLiteCache):
+    """Raw LLM completions keyed on a fingerprint of model, template version and prompt"""
+
+    def __init__(self, path: str = "cache/llm_cache.sqlite", ttl: float = 7 * 86400, max_entries: int = 20000):
+        super().__init__(path, "llm_completions", max_entries=max_entries, default_ttl=ttl)
+
+    def make_key(self, model: str, template_version: str, prompt_parts: List[str]) -> str:
+        return self.fingerprint(model, template_version, prompt_parts)
+
+    def get_completion(self, key: str) -> Optional[str]:
+        return self.get(key)
+
+    def set_completion(self, key: str, completion: str) -> None:
+        self.set(key, completion)
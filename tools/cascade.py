@@ -0,0 +1,83 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+# Fields each search_type's answer must contain, in prompt order
+EXPECTED_FIELDS = {
+    "product": 4,
+    "location": 5,
+    "company": 4,
+}
+# Fields where "Not found" from the small model is worth a second opinion
+KEY_FIELDS = {
+    "product": ("product_name", "price", "source_url"),
+    "location": ("location_name", "country", "population"),
+    "company": ("company_name", "industry", "headquarters"),
+}
+
+_PRICE = re.compile(r"([$€£¥₹]|\b(USD|EUR|GBP|CAD|AUD|MXN|JPY|INR)\b)\s*\d|\d[\d,.]*\s*([$€£¥₹]|\b(USD|EUR|GBP|CAD|AUD|MXN|JPY|INR)\b)", re.I)
+_NUMBER = re.compile(r"\d")
+
+
+def _is_missing(value: str) -> bool:
+    value = value.strip().lower()
+    return not value or "not found" in value or value in ("n/a", "unknown", "none")
+
+
+def extraction_problems(response: Optional[str], parsed: Dict[str, str], search_type: str) -> List[str]:
+    """Reasons an extraction looks too weak to keep; an empty list means accept it"""
+    if not response or not parsed:
+        return ["empty"]
+
+    problems = []
+    expected = EXPECTED_FIELDS.get(search_type)
+    if expected and len(response.split("<||>")) != expected:
+        problems.append("field_count")
+    for field in KEY_FIELDS.get(search_type, ()):
+        if _is_missing(parsed.get(field, "")):
+            problems.append(f"missing_{field}")
+
+    if search_type == "product":
+        price = parsed.get("price", "")
+        if not _is_missing(price) and not _PRICE.search(price):
+            problems.append("bad_price")
+        source_url = parsed.get("source_url", "").strip()
+        if not _is_missing(source_url):
+            url = urlparse(source_url)
+            if url.scheme not in ("http", "https") or not url.netloc:
+                problems.append("bad_url")
+    elif search_type == "location":
+        population = parsed.get("population", "")
+        if not _is_missing(population) and not _NUMBER.search(population):
+            problems.append("bad_population")
+    elif search_type == "company":
+        revenue = parsed.get("revenue", "")
+        if not _is_missing(revenue) and not _NUMBER.search(revenue):
+            problems.append("bad_revenue")
+    return problems
+
+
+class CascadeStats:
+    """Counts how often the small model's answer was kept or escalated, and why"""
+
+    def __init__(self):
+        self.accepted = 0
+        self.escalated = 0
+        self.reasons = Counter()
+
+    def record(self, problems: List[str]) -> None:
+        if problems:
+            self.escalated += 1
+            self.reasons.update(problems)
+        else:
+            self.accepted += 1
+
+    def summary(self) -> Dict:
+        total = self.accepted + self.escalated
+        return {
+            "accepted": self.accepted,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / total, 3) if total else 0.0,
+            "reasons": dict(self.reasons.most_common()),
+        }
@@ -0,0 +1,98 @@
+import math
+import re
+from typing import Iterable, List, Optional, Set
+
+from tools.records import SearchRecord
+
+# Tokens reserved for search results in the prompt, per model. Kept well under each model's
+# context window: prompt tokens are what we pay for and what drives Groq latency.
+MODEL_CONTEXT_BUDGETS = {
+    "llama-3.3-70b-versatile": 2500,
+    "llama-3.1-8b-instant": 2000,
+    "gemma2-9b-it": 1500,
+}
+DEFAULT_CONTEXT_BUDGET = 2000
+SEPARATOR = "-" * 80 + "\n\n"
+
+_TOKEN = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough count for Llama/Gemma tokenizers on English web text (~4 characters per token)"""
+    return math.ceil(len(text) / 4)
+
+
+def snippet_relevance(query: str, result: SearchRecord) -> float:
+    """Fraction of query terms that appear in the result's title, description or body"""
+    terms = set(_TOKEN.findall(query.lower()))
+    if not terms:
+        return 0.0
+    text = f"{result.title} {result.description} {result.body}".lower()
+    found = set(_TOKEN.findall(text))
+    return len(terms & found) / len(terms)
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    words = _TOKEN.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _similarity(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ContextBuilder:
+    """Packs search results into the LLM prompt: near-duplicate snippets are dropped, the
+    rest are ranked by relevance to the query and added until the token budget is spent."""
+
+    def __init__(self, model: Optional[str] = None, token_budget: Optional[int] = None,
+                 max_body_chars: int = 1500, similarity_threshold: float = 0.8):
+        self.token_budget = token_budget or MODEL_CONTEXT_BUDGETS.get(model, DEFAULT_CONTEXT_BUDGET)
+        self.max_body_chars = max_body_chars
+        self.similarity_threshold = similarity_threshold
+
+    @staticmethod
+    def _block(result: SearchRecord, body: str) -> str:
+        return (
+            f"SOURCE: {result.url}\n"
+            f"TITLE: {result.title}\n"
+            f"DESCRIPTION: {result.description}\n"
+            f"CONTENT: {body}...\n"
+            f"{SEPARATOR}"
+        )
+
+    def _dedupe(self, results: List[SearchRecord]) -> List[SearchRecord]:
+        kept, kept_shingles = [], []
+        for result in results:
+            shingles = _shingles(f"{result.description} {result.body}")
+            if any(_similarity(shingles, seen) >= self.similarity_threshold for seen in kept_shingles):
+                continue
+            kept.append(result)
+            kept_shingles.append(shingles)
+        return kept
+
+    def build(self, query: str, results: Iterable[SearchRecord], token_budget: Optional[int] = None) -> str:
+        budget = token_budget or self.token_budget
+        unique = self._dedupe(list(results))
+        # Stable sort, so equally relevant results keep the search engine's order
+        ranked = sorted(unique, key=lambda result: snippet_relevance(query, result), reverse=True)
+
+        blocks, used = [], 0
+        for result in ranked:
+            body = str(result.body)[:self.max_body_chars]
+            block = self._block(result, body)
+            cost = estimate_tokens(block)
+            if used + cost > budget:
+                # Squeeze a shortened body of this result into whatever budget is left, then stop
+                overhead = estimate_tokens(self._block(result, ""))
+                remaining_chars = (budget - used - overhead) * 4
+                if remaining_chars >= 200:
+                    blocks.append(self._block(result, body[:remaining_chars]))
+                break
+            blocks.append(block)
+            used += cost
+        return "".join(blocks)
@@ -0,0 +1,114 @@
+import atexit
+import functools
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from selenium import webdriver
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+from webdriver_manager.firefox import GeckoDriverManager
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def gecko_driver_path() -> str:
+    """Resolve (and download if needed) geckodriver once per process"""
+    return GeckoDriverManager().install()
+
+
+def firefox_options() -> Options:
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-notifications')
+    return options
+
+
+class _PooledDriver:
+    def __init__(self, driver: webdriver.Firefox):
+        self.driver = driver
+        self.pages = 0
+
+
+class DriverPool:
+    """Bounded pool of warm headless Firefox instances.
+
+    At most ``size`` browsers exist at once. A browser is recycled after
+    ``max_pages_per_driver`` pages, and discarded whenever a page raises.
+    """
+
+    def __init__(self, size: int = 2, max_pages_per_driver: int = 50, page_load_timeout: int = 20,
+                 options: Optional[Options] = None):
+        self.size = size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.page_load_timeout = page_load_timeout
+        self.options = options or firefox_options()
+        self._idle: "queue.LifoQueue[_PooledDriver]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def _launch(self) -> _PooledDriver:
+        driver = webdriver.Firefox(service=Service(gecko_driver_path()), options=self.options)
+        driver.set_page_load_timeout(self.page_load_timeout)
+        return _PooledDriver(driver)
+
+    @staticmethod
+    def _quit(pooled: _PooledDriver) -> None:
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing driver: {str(e)}")
+
+    @contextmanager
+    def driver(self) -> Iterator[webdriver.Firefox]:
+        """Borrow a browser; blocks while all ``size`` browsers are busy"""
+        self._slots.acquire()
+        pooled = None
+        try:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._launch()
+            yield pooled.driver
+        except Exception:
+            if pooled is not None:
+                self._quit(pooled)
+                pooled = None
+            raise
+        finally:
+            if pooled is not None:
+                pooled.pages += 1
+                if self._closed or pooled.pages >= self.max_pages_per_driver:
+                    self._quit(pooled)
+                else:
+                    self._idle.put(pooled)
+            self._slots.release()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_default_pool: Optional[DriverPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_driver_pool() -> DriverPool:
+    """Process-wide pool shared by every WebScraper that isn't given its own"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from tools.context import snippet_relevance
+from tools.records import SearchRecord
+from tools.scrape import AsyncWebScraper
+
+logger = logging.getLogger(__name__)
+
+# Higher is better; matched against the registered domain and any parent domain
+DEFAULT_DOMAIN_PRIORITY = {
+    "product": {"amazon.com": 3, "homedepot.com": 3, "lowes.com": 2, "walmart.com": 2, "bestbuy.com": 2,
+                "target.com": 2},
+    "company": {"wikipedia.org": 3, "reuters.com": 2, "bloomberg.com": 2, "macrotrends.net": 2,
+                "companiesmarketcap.com": 2, "crunchbase.com": 1},
+    "location": {"wikipedia.org": 3, "britannica.com": 2, "census.gov": 3, "worldpopulationreview.com": 2,
+                 "citypopulation.de": 2},
+}
+
+
+def domain_priority(url: str, priorities: Dict[str, float]) -> float:
+    host = urlparse(url).netloc.lower().split(":")[0]
+    parts = host.split(".")
+    for start in range(len(parts) - 1):
+        score = priorities.get(".".join(parts[start:]))
+        if score is not None:
+            return score
+    return 0.0
+
+
+def rank_results(query: str, search_type: str, results: List[SearchRecord], top_k: int,
+                 priorities: Optional[Dict[str, Dict[str, float]]] = None) -> List[SearchRecord]:
+    """Top-K scrapeable results by domain priority, then snippet relevance"""
+    priorities = (priorities or DEFAULT_DOMAIN_PRIORITY).get(search_type, {})
+    candidates = [result for result in results if urlparse(result.url).scheme in ("http", "https")]
+    candidates.sort(
+        key=lambda result: (domain_priority(result.url, priorities), snippet_relevance(query, result)),
+        reverse=True
+    )
+    return candidates[:top_k]
+
+
+class Enricher:
+    """Scrapes the most promising search results for a query within a wall-clock deadline and
+    merges whatever finished in time over the matching search rows (same url)."""
+
+    def __init__(self, scraper: Optional[AsyncWebScraper] = None, top_k: int = 3, deadline: float = 10.0,
+                 priorities: Optional[Dict[str, Dict[str, float]]] = None):
+        self.scraper = scraper or AsyncWebScraper(timeout=int(deadline), max_retries=1, selenium_fallback=False)
+        self.top_k = top_k
+        self.deadline = deadline
+        self.priorities = priorities
+
+    async def enrich(self, query: str, search_type: str, results: List[SearchRecord]) -> List[SearchRecord]:
+        ranked = rank_results(query, search_type, results, self.top_k, self.priorities)
+        if not ranked:
+            return results
+
+        tasks = [asyncio.ensure_future(self.scraper.scrape_one(result.url)) for result in ranked]
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+        logger.debug(f"Enriched {len(done)}/{len(tasks)} URLs within {self.deadline}s for: {query}")
+
+        merged = {result.url: result for result in results}
+        for task in done:
+            if task.cancelled() or task.exception() is not None:
+                continue
+            scraped = task.result()
+            if scraped.get('method') not in ('failed', 'error'):
+                merged[scraped['url']] = SearchRecord.from_dict(scraped)
+        return list(merged.values())
+
+    async def close(self) -> None:
+        await self.scraper.close()
@@ -0,0 +1,234 @@
+import html
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+import lxml.html
+from bs4 import BeautifulSoup, CData, NavigableString
+
+# Never visible text
+SKIP_TAGS = frozenset({"script", "style", "noscript", "template", "head"})
+# Page chrome as well, for callers that only want the article text (JinaSpider)
+CHROME_TAGS = SKIP_TAGS | frozenset({"meta", "link", "footer", "nav", "aside"})
+
+Markup = Union[str, bytes]
+
+
+@dataclass
+class ExtractedPage:
+    title: str
+    description: str
+    body: str
+
+
+def clean_text(text: str) -> str:
+    if not text:
+        return ""
+    return re.sub(r"\s+", " ", html.unescape(text)).strip()
+
+
+class _TextBudget:
+    """Accumulates whitespace-normalized text until ``limit`` characters are collected"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts: List[str] = []
+        self.size = 0
+
+    @property
+    def full(self) -> bool:
+        return self.size >= self.limit
+
+    def add(self, text: Optional[str]) -> None:
+        if not text or self.full:
+            return
+        text = " ".join(text.split())
+        if text:
+            self.parts.append(text)
+            self.size += len(text) + 1
+
+    def text(self) -> str:
+        return " ".join(self.parts)[:self.limit]
+
+
+class BeautifulSoupExtractor:
+    """The original html.parser + BeautifulSoup path, with an early stop on the text walk"""
+
+    name = "bs4"
+
+    def extract(self, markup: Markup, budget: int = 1000, skip_tags: FrozenSet[str] = SKIP_TAGS,
+                main_content: bool = False) -> ExtractedPage:
+        soup = BeautifulSoup(markup, "html.parser")
+        title = clean_text(soup.title.get_text()) if soup.title else ""
+
+        description = soup.find("meta", {"name": ["description", "Description"]})
+        if not description:
+            description = soup.find("meta", {"property": "og:description"})
+        description = clean_text(description.get("content", "")) if description else ""
+
+        root = None
+        if main_content:
+            root = soup.find("main") or soup.find("article") or soup.find("div", class_="content")
+        root = root or soup.body or soup
+
+        collected = _TextBudget(budget)
+        for string in root.find_all(string=True):
+            if collected.full:
+                break
+            if type(string) not in (NavigableString, CData):
+                continue
+            if any(parent.name in skip_tags for parent in string.parents):
+                continue
+            collected.add(str(string))
+        return ExtractedPage(title, description, collected.text())
+
+
+class LxmlExtractor:
+    """libxml2 parse (C speed) and an element walk that stops as soon as the budget is filled"""
+
+    name = "lxml"
+    _main_xpaths = ("//main", "//article", "//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')]")
+
+    def extract(self, markup: Markup, budget: int = 1000, skip_tags: FrozenSet[str] = SKIP_TAGS,
+                main_content: bool = False) -> ExtractedPage:
+        if isinstance(markup, str):
+            markup = markup.encode("utf-8", errors="replace")
+            parser = lxml.html.HTMLParser(encoding="utf-8")
+        else:
+            parser = None
+        try:
+            doc = lxml.html.document_fromstring(markup, parser=parser)
+        except Exception:
+            # Empty or unparseable documents
+            return ExtractedPage("", "", "")
+
+        title = doc.findtext(".//title") or ""
+        description = (doc.xpath("//meta[@name='description' or @name='Description']/@content")
+                       or doc.xpath("//meta[@property='og:description']/@content") or [""])[0]
+
+        root = None
+        if main_content:
+            for xpath in self._main_xpaths:
+                found = doc.xpath(xpath)
+                if found:
+                    root = found[0]
+                    break
+        if root is None:
+            root = doc.find("body")
+        if root is None:
+            root = doc
+
+        collected = _TextBudget(budget)
+        self._walk(root, skip_tags, collected)
+        return ExtractedPage(clean_text(title), clean_text(description), collected.text())
+
+    def _walk(self, element, skip_tags: FrozenSet[str], collected: _TextBudget) -> None:
+        # Comments and processing instructions have a non-string tag and no visible text
+        if isinstance(element.tag, str) and element.tag not in skip_tags:
+            collected.add(element.text)
+            for child in element:
+                if collected.full:
+                    return
+                self._walk(child, skip_tags, collected)
+        # Tail text belongs to the parent, so it is kept even when this element is skipped
+        collected.add(element.tail)
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _StreamingParser(HTMLParser):
+    def __init__(self, budget: int, skip_tags: FrozenSet[str]):
+        super().__init__(convert_charrefs=True)
+        self.skip_tags = skip_tags
+        self.collected = _TextBudget(budget)
+        self.title_parts: List[str] = []
+        self.meta: Dict[str, str] = {}
+        self._skip_depth = 0
+        self._in_title = False
+        self._in_head = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            attrs = dict(attrs)
+            key = (attrs.get("name") or attrs.get("property") or "").lower()
+            if key in ("description", "og:description") and key not in self.meta:
+                self.meta[key] = attrs.get("content") or ""
+        elif tag == "head":
+            self._in_head = True
+        elif tag == "body":
+            self._in_head = False
+        if tag in self.skip_tags and tag not in ("meta", "link", "head"):
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag == "head":
+            self._in_head = False
+        if tag in self.skip_tags and tag not in ("meta", "link", "head") and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+        elif not self._in_head and not self._skip_depth:
+            self.collected.add(data)
+            if self.collected.full:
+                raise _StopParsing
+
+
+class StreamingExtractor:
+    """Pure-Python tokenizer fed in small chunks; stops reading the document once the
+    budget is filled, so huge pages cost only what is needed. Has no notion of a main
+    content area: ``main_content`` is ignored and the whole body is used."""
+
+    name = "stream"
+    chunk_size = 16384
+
+    def extract(self, markup: Markup, budget: int = 1000, skip_tags: FrozenSet[str] = SKIP_TAGS,
+                main_content: bool = False) -> ExtractedPage:
+        if isinstance(markup, bytes):
+            markup = markup.decode("utf-8", errors="replace")
+        parser = _StreamingParser(budget, skip_tags)
+        try:
+            for start in range(0, len(markup), self.chunk_size):
+                parser.feed(markup[start:start + self.chunk_size])
+            parser.close()
+        except _StopParsing:
+            pass
+        description = parser.meta.get("description") or parser.meta.get("og:description") or ""
+        return ExtractedPage(clean_text("".join(parser.title_parts)), clean_text(description),
+                             parser.collected.text())
+
+
+EXTRACTORS = {
+    BeautifulSoupExtractor.name: BeautifulSoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+    StreamingExtractor.name: StreamingExtractor,
+}
+
+
+def get_extractor(name: str = "lxml"):
+    try:
+        return EXTRACTORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown extractor '{name}', choose from {sorted(EXTRACTORS)}")
+
+
+def extract_article(extractor, markup: Markup, max_chars: int = 2000) -> Tuple[str, str]:
+    """Main-content text as JinaSpider wants it: no page chrome, no single-character
+    tokens, cut to max_chars at the last full stop. Returns (title, text)."""
+    # A little headroom over max_chars because single-character tokens are dropped
+    page = extractor.extract(markup, budget=max_chars + 500, skip_tags=CHROME_TAGS, main_content=True)
+    text_content = ' '.join(text for text in page.body.split() if len(text) > 1)
+    if len(text_content) > max_chars:
+        text_content = text_content[:max_chars]
+        last_period = text_content.rfind('.')
+        if last_period > 0:
+            text_content = text_content[:last_period + 1]
+    return page.title, text_content.strip()
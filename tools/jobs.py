@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from tools.service import ScraperService
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """State of one background batch; safe to read from other threads while it runs"""
+
+    def __init__(self, job_id: str, df: pd.DataFrame):
+        self.job_id = job_id
+        self.df = df
+        self.total = len(df)
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.done = 0
+        self.last_query: Optional[str] = None
+        self._results: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+
+    @property
+    def running(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def mark_started(self) -> None:
+        self.status = "running"
+        self.started = time.time()
+
+    def add_result(self, position: int, result: Dict) -> None:
+        with self._lock:
+            self._results[position] = result
+
+    def on_progress(self, done: int, total: int, row: Dict) -> None:
+        self.done = done
+        self.last_query = row['query']
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Results finished so far, in input order"""
+        with self._lock:
+            rows = [self._results[position] for position in sorted(self._results)]
+        return pd.DataFrame(rows)
+
+
+class JobManager:
+    """Runs SearchScraper batches as background jobs on a shared ScraperService, so the
+    Streamlit script thread only starts jobs and polls them. Meant to live in
+    st.cache_resource so jobs survive reruns; only the newest ``keep`` jobs are kept."""
+
+    def __init__(self, service: ScraperService, keep: int = 20):
+        self.service = service
+        self.keep = keep
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, df: pd.DataFrame) -> str:
+        job = Job(uuid.uuid4().hex[:12], df.reset_index(drop=True))
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.keep:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.running:
+                    break
+                del self._jobs[oldest_id]
+        job._future = self.service.process_dataframe(
+            job.df, on_start=job.mark_started, concurrent=True,
+            progress_callback=job.on_progress, result_callback=job.add_result,
+        )
+        job._future.add_done_callback(lambda future: self._finish(job, future))
+        return job.job_id
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id) if job_id else None
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> None:
+        """Cancel a queued or running job; its task is cancelled on the service loop"""
+        job = self.get(job_id)
+        if job is not None and job.running and job._future is not None:
+            job._future.cancel()
+
+    @staticmethod
+    def _finish(job: Job, future: Future) -> None:
+        try:
+            future.result()
+            job.status = "done"
+        except CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+
+    def shutdown(self) -> None:
+        for job in self.jobs():
+            self.cancel(job.job_id)
@@ -0,0 +1,79 @@
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+ANSWER_LINE = re.compile(r"^\s*\[?(\d+)[\].):]\s*(.+?)\s*$")
+
+
+class MicroBatcher:
+    """Collects items per group key and flushes them together once ``max_size`` items are
+    waiting or the first item has waited ``linger`` seconds. Each submit() resolves to its
+    own slot of the list returned by ``flush(key, items)``. Must be used from a single loop."""
+
+    def __init__(self, flush: Callable[[Hashable, List[Any]], Awaitable[List[Any]]], max_size: int, linger: float = 0.5):
+        self.flush = flush
+        self.max_size = max_size
+        self.linger = linger
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._running = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((item, future))
+        if len(pending) >= self.max_size:
+            self._flush_now(key)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(self.linger, self._flush_now, key)
+        return await future
+
+    def _flush_now(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: Hashable, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            results = await self.flush(key, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def build_batch_input(queries: List[str], formatted_results: List[str]) -> str:
+    """Human message packing several queries and their trimmed results into one prompt"""
+    sections = [
+        f"QUERY {number}: {query}\nSEARCH RESULTS {number}:\n{results}"
+        for number, (query, results) in enumerate(zip(queries, formatted_results), start=1)
+    ]
+    return (
+        f"Answer each of the {len(queries)} numbered queries below using ONLY that query's own search results.\n"
+        "Return exactly one line per query, in order, formatted as:\n"
+        "<number>. <answer in the required <||> format>\n"
+        "No other text.\n\n" + "\n\n".join(sections)
+    )
+
+
+def split_batch_response(response: str, count: int) -> List[Optional[str]]:
+    """Map a numbered multi-line answer back to per-query answers; missing numbers become None"""
+    answers: List[Optional[str]] = [None] * count
+    for line in (response or "").splitlines():
+        match = ANSWER_LINE.match(line)
+        if not match:
+            continue
+        number = int(match.group(1))
+        if 1 <= number <= count and answers[number - 1] is None and "<||>" in match.group(2):
+            answers[number - 1] = match.group(2)
+    return answers
@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+from langchain_core.messages import AIMessage, BaseMessage
+
+from tools.context import estimate_tokens
+from tools.metrics import METRICS
+from tools.rate_limiter import HostRateLimiter, host_of, retry_after_of, status_of
+from tools.retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# Free-tier Groq limits; raise them for paid plans
+GROQ_TOKENS_PER_MINUTE = {
+    "llama-3.3-70b-versatile": 12000,
+    "llama-3.1-8b-instant": 6000,
+    "gemma2-9b-it": 15000,
+}
+
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+class BackendCoolingDown(Exception):
+    """Raised for a call that was queued on a backend which has since been throttled"""
+
+
+class _TokensPerMinute:
+    """Token bucket holding one minute's worth of prompt+completion tokens"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, tokens: int) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = min(tokens, self.capacity) - self.tokens
+            return max(missing / self.rate, 0.0)
+
+    def take(self, tokens: int) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= min(tokens, self.capacity)
+
+
+class ChatBackend:
+    """One chat endpoint with its own concurrency cap, tokens-per-minute budget and
+    cooldown after throttling. Subclasses implement complete()."""
+
+    def __init__(self, name: str, model: str, host: str, max_concurrency: int = 4,
+                 tokens_per_minute: Optional[int] = None, max_output_tokens: int = 256):
+        self.name = name
+        self.model = model
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.max_output_tokens = max_output_tokens
+        self.tokens_per_minute = _TokensPerMinute(tokens_per_minute) if tokens_per_minute else None
+        self.cooldown_until = 0.0
+        self.stats = {"requests": 0, "failures": 0, "throttled": 0, "hedge_wins": 0}
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def saturated(self) -> bool:
+        return self._semaphore is not None and self._semaphore.locked()
+
+    def wait_time(self, tokens: int) -> float:
+        """Seconds until this backend may take a request of ``tokens`` tokens"""
+        wait = max(self.cooldown_until - time.monotonic(), 0.0)
+        if self.tokens_per_minute is not None:
+            wait = max(wait, self.tokens_per_minute.wait_time(tokens))
+        return wait
+
+    def reserve(self, tokens: int) -> None:
+        self.stats["requests"] += 1
+        if self.tokens_per_minute is not None:
+            self.tokens_per_minute.take(tokens)
+
+    def cool_down(self, seconds: float) -> None:
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+    async def complete(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class LangChainBackend(ChatBackend):
+    """Wraps a LangChain chat model such as ChatGroq"""
+
+    def __init__(self, name: str, llm, host: str, **limits):
+        super().__init__(name, getattr(llm, "model_name", name), host, **limits)
+        self.llm = llm
+
+    async def complete(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        return await self.llm.ainvoke(list(messages))
+
+
+class OpenAICompatibleBackend(ChatBackend):
+    """Any OpenAI-style /chat/completions endpoint: OpenAI, Together, a vLLM, llama.cpp or
+    Ollama server, or a local stand-in during tests"""
+
+    def __init__(self, name: str, base_url: str, model: str, api_key: Optional[str] = None,
+                 timeout: float = 30.0, temperature: float = 0.0, **limits):
+        super().__init__(name, model, host_of(base_url), **limits)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.temperature = temperature
+        self._client = None
+        self._client_loop = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+            self._client = httpx.AsyncClient(base_url=self.base_url, headers=headers, timeout=self.timeout)
+            self._client_loop = loop
+        return self._client
+
+    async def complete(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": _ROLES.get(message.type, "user"), "content": message.content}
+                         for message in messages],
+            "temperature": self.temperature,
+            "max_tokens": self.max_output_tokens,
+        }
+        response = await self._get_client().post("/chat/completions", json=payload)
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage") or {}
+        usage_metadata = None
+        if "prompt_tokens" in usage:
+            usage_metadata = {
+                "input_tokens": usage["prompt_tokens"],
+                "output_tokens": usage.get("completion_tokens", 0),
+                "total_tokens": usage.get("total_tokens", usage["prompt_tokens"] + usage.get("completion_tokens", 0)),
+            }
+        return AIMessage(content=data["choices"][0]["message"]["content"], usage_metadata=usage_metadata)
+
+    async def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
+
+def fallback_backends_from_env(model: str) -> List[ChatBackend]:
+    """An OpenAI-compatible backup when LLM_FALLBACK_BASE_URL is set
+    (LLM_FALLBACK_MODEL and LLM_FALLBACK_API_KEY are optional)"""
+    base_url = os.getenv("LLM_FALLBACK_BASE_URL")
+    if not base_url:
+        return []
+    return [OpenAICompatibleBackend(
+        "fallback",
+        base_url,
+        os.getenv("LLM_FALLBACK_MODEL", model),
+        api_key=os.getenv("LLM_FALLBACK_API_KEY"),
+    )]
+
+
+class LLMRouter:
+    """Drop-in for a chat model's ainvoke() over several backends, preferred in list order.
+
+    Backends that are cooling down after a 429/Retry-After, out of tokens-per-minute budget
+    or at their concurrency cap are passed over; a failed call fails over at once to a
+    backend it has not tried yet. Once every backend has failed, further attempts are paced
+    by ``retry_policy`` (backoff, jitter and retry budget); it is the only retry layer, so
+    callers should not wrap ainvoke() in another. With ``hedge_after`` set, a call still
+    unanswered after that many seconds is raced against a second backend and the first
+    answer wins."""
+
+    def __init__(self, backends: List[ChatBackend], rate_limiter: Optional[HostRateLimiter] = None,
+                 hedge_after: Optional[float] = None, max_attempts: Optional[int] = None,
+                 base_cooldown: float = 10.0, retry_policy: Optional[RetryPolicy] = None):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.rate_limiter = rate_limiter
+        self.hedge_after = hedge_after
+        self.base_cooldown = base_cooldown
+        self.retry_policy = retry_policy or RetryPolicy(
+            "llm", max_attempts=max_attempts or 3, base_delay=2.0, retry_on=(BackendCoolingDown,)
+        )
+
+    def _cost(self, messages: Sequence[BaseMessage], backend: ChatBackend) -> int:
+        return sum(estimate_tokens(str(message.content)) for message in messages) + backend.max_output_tokens
+
+    def _pick(self, messages: Sequence[BaseMessage], exclude: Optional[ChatBackend] = None,
+              among: Optional[List[ChatBackend]] = None):
+        """(wait, backend) for the backend that can start soonest, by preference on ties"""
+        choices = [
+            (backend.wait_time(self._cost(messages, backend)), backend.saturated(), position, backend)
+            for position, backend in enumerate(self.backends)
+            if backend is not exclude and (among is None or backend in among)
+        ]
+        if not choices:
+            return None, None
+        wait, _, _, backend = min(choices, key=lambda choice: choice[:3])
+        return wait, backend
+
+    async def _call(self, backend: ChatBackend, messages: Sequence[BaseMessage]) -> AIMessage:
+        async with backend.semaphore():
+            if backend.cooldown_until > time.monotonic():
+                raise BackendCoolingDown(backend.name)
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(backend.host)
+            backend.reserve(self._cost(messages, backend))
+            try:
+                with METRICS.timer("llm_backend_seconds", backend=backend.name):
+                    response = await backend.complete(messages)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                backend.stats["failures"] += 1
+                retry_after = retry_after_of(e)
+                # Only throttling benches a backend; other errors just fail over for this call
+                if status_of(e) in (429, 503) or retry_after is not None:
+                    backend.stats["throttled"] += 1
+                    backend.cool_down(retry_after or self.base_cooldown)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.report(backend.host, error=e)
+                logger.warning(f"LLM backend {backend.name} failed: {e}")
+                raise
+            if self.rate_limiter is not None:
+                self.rate_limiter.report(backend.host)
+            return response
+
+    async def _hedged(self, primary: ChatBackend, messages: Sequence[BaseMessage]) -> AIMessage:
+        first = asyncio.ensure_future(self._call(primary, messages))
+        if self.hedge_after is None:
+            return await first
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done:
+                return first.result()
+            wait, backup = self._pick(messages, exclude=primary)
+            if backup is None or wait > 0:
+                return await first
+            logger.info(f"Hedging slow {primary.name} call on {backup.name}")
+            second = asyncio.ensure_future(self._call(backup, messages))
+            tasks.add(second)
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            backup.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def ainvoke(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        # Any error fails over to an untried backend at once; only when every backend has
+        # failed does retry_policy decide whether (and after what backoff) to go again
+        untried = list(self.backends)
+        while True:
+            wait, backend = self._pick(messages, among=untried)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await self._hedged(backend, messages)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                untried.remove(backend)
+                if not untried:
+                    return await self.retry_policy.call_after(e, self._attempt, messages)
+
+    async def _attempt(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        wait, backend = self._pick(messages)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return await self._hedged(backend, messages)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {backend.name: {"model": backend.model, **backend.stats} for backend in self.backends}
+
+    async def close(self) -> None:
+        for backend in self.backends:
+            await backend.close()
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Seconds; covers cache hits through slow Selenium pages and throttled LLM calls
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation, capped at the largest value seen"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    """Counters and latency histograms keyed by name and labels, exportable as
+    Prometheus text or a JSON summary. Safe to share between threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._server = None
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[Dict[str, object]]:
+        """Times the block into histogram ``name``. The yielded dict holds the labels, so the
+        block can set an outcome label (e.g. ``labels["status"] = "error"``) before it ends."""
+        labels.setdefault("status", "ok")
+        started = time.perf_counter()
+        try:
+            yield labels
+        except BaseException as e:
+            if labels["status"] == "ok":
+                labels["status"] = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Dict[str, Dict]]:
+        """Counters, and count/mean/p50/p95/max per histogram series, for JSON export"""
+        summary = {"counters": {}, "timings": {}}
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                for key, value in series.items():
+                    summary["counters"][f"{name}{_format_labels(key)}"] = value
+            for name, series in sorted(self._histograms.items()):
+                for key, histogram in series.items():
+                    summary["timings"][f"{name}{_format_labels(key)}"] = {
+                        "count": histogram.count,
+                        "mean": round(histogram.sum / histogram.count, 4) if histogram.count else 0.0,
+                        "p50": histogram.quantile(0.5),
+                        "p95": histogram.quantile(0.95),
+                        "max": round(histogram.max, 4),
+                    }
+        return summary
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.summary(), handle, indent=2)
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> None:
+        """Expose to_prometheus() at http://host:port/metrics from a daemon thread"""
+        if self._server is not None:
+            return
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+
+
+# Process-wide registry, like prometheus_client's default one
+METRICS = Metrics()
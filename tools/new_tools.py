@@ -1,9 +1,10 @@
 import requests
 from bs4 import BeautifulSoup
 import re
+from typing import Optional
 
 
-def get_proxy_list():
+def get_proxy_list(limit: Optional[int] = 10):
     url = "https://free-proxy-list.net/"
 
 
@@ -21,7 +22,7 @@ def get_proxy_list():
 
     filtered_proxies = []
 
-    for row in rows[:10]:
+    for row in rows[:limit]:
         cols = row.find_all('td')
         if len(cols) >= 7:
             ip = cols[0].text.strip()
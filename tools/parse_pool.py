@@ -0,0 +1,65 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tools.extract import ExtractedPage, extract_article, get_extractor
+
+# Per worker process, so each backend is built once per worker rather than once per page
+_extractors: Dict[str, object] = {}
+
+
+def _extractor(name: str):
+    if name not in _extractors:
+        _extractors[name] = get_extractor(name)
+    return _extractors[name]
+
+
+def _decode(raw: bytes, encoding: Optional[str]) -> str:
+    return raw.decode(encoding or "utf-8", errors="replace")
+
+
+def parse_page(raw: bytes, encoding: Optional[str], extractor: str, budget: int) -> ExtractedPage:
+    return _extractor(extractor).extract(_decode(raw, encoding), budget=budget)
+
+
+def parse_article(raw: bytes, encoding: Optional[str], extractor: str, max_chars: int) -> Tuple[str, str]:
+    return extract_article(_extractor(extractor), _decode(raw, encoding), max_chars)
+
+
+def _parse_page_item(item: Tuple[bytes, Optional[str]], extractor: str, budget: int) -> ExtractedPage:
+    raw, encoding = item
+    return parse_page(raw, encoding, extractor, budget)
+
+
+class ParsePool:
+    """Runs HTML decoding and text extraction in worker processes so parsing scales past the GIL.
+
+    Raw response bytes go in and small ExtractedPage results come back, which keeps pickling cheap.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunksize: int = 8, extractor: str = "lxml"):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.chunksize = chunksize
+        self.extractor = extractor
+        # forkserver avoids forking a parent that already runs threads (DDGS pool, proxy refresh)
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method))
+
+    def submit_page(self, raw: bytes, encoding: Optional[str], budget: int) -> Future:
+        return self._executor.submit(parse_page, raw, encoding, self.extractor, budget)
+
+    def submit_article(self, raw: bytes, encoding: Optional[str], max_chars: int) -> Future:
+        return self._executor.submit(parse_article, raw, encoding, self.extractor, max_chars)
+
+    async def parse_page(self, raw: bytes, encoding: Optional[str], budget: int) -> ExtractedPage:
+        return await asyncio.wrap_future(self.submit_page(raw, encoding, budget))
+
+    def parse_many(self, items: Iterable[Tuple[bytes, Optional[str]]], budget: int) -> List[ExtractedPage]:
+        """Parse (raw, encoding) pairs in order, shipping them to workers ``chunksize`` at a time"""
+        worker = partial(_parse_page_item, extractor=self.extractor, budget=budget)
+        return list(self._executor.map(worker, items, chunksize=self.chunksize))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
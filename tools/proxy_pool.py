@@ -0,0 +1,157 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from tools.new_tools import get_proxy_list
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProxyStats:
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    latency: Optional[float] = None  # exponentially weighted moving average, seconds
+    quarantined_until: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        # Laplace smoothing so untried proxies start at 0.5 instead of 0 or 1
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+
+class ProxyPool:
+    """Health-scored proxy pool.
+
+    Proxies are picked with probability proportional to success_rate / latency, failing
+    proxies are quarantined with exponential backoff, and the list is refreshed from
+    ``fetch`` on a background thread. Pass ``proxies`` to use a fixed local list instead.
+    """
+
+    def __init__(self, proxies: Optional[List[Dict]] = None, fetch: Optional[Callable[[], List[Dict]]] = None,
+                 refresh_interval: float = 900, base_quarantine: float = 30, max_quarantine: float = 1800,
+                 default_latency: float = 5.0, latency_alpha: float = 0.3, scheme: str = "socks5"):
+        self.base_quarantine = base_quarantine
+        self.max_quarantine = max_quarantine
+        self.default_latency = default_latency
+        self.latency_alpha = latency_alpha
+        self.scheme = scheme
+        self._proxies: Dict[str, Dict] = {}
+        self._stats: Dict[str, ProxyStats] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresh_thread = None
+
+        if proxies is not None:
+            self._fetch = None
+        else:
+            self._fetch = fetch or (lambda: get_proxy_list(limit=None))
+            # The first load must succeed: with no proxies every search would fail, and the
+            # rows would be checkpointed as having no results
+            proxies = self._fetch()
+        if not proxies:
+            raise ValueError("No proxies to build the pool from")
+        self._replace(proxies)
+        if self._fetch is not None and refresh_interval:
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_loop, args=(refresh_interval,), name="proxy-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+
+    @staticmethod
+    def key(proxy: Dict) -> str:
+        return f"{proxy['ip']}:{proxy['port']}"
+
+    def url(self, proxy: Dict) -> str:
+        return f"{self.scheme}://{self.key(proxy)}"
+
+    def __len__(self) -> int:
+        return len(self._proxies)
+
+    def _replace(self, proxies: List[Dict]) -> None:
+        with self._lock:
+            self._proxies = {self.key(proxy): proxy for proxy in proxies}
+            # Keep history for proxies that survived the refresh
+            self._stats = {key: self._stats.get(key, ProxyStats()) for key in self._proxies}
+
+    def refresh(self) -> None:
+        if self._fetch is None:
+            return
+        try:
+            proxies = self._fetch()
+        except Exception as e:
+            logger.warning(f"Proxy list refresh failed: {e}")
+            return
+        if proxies:
+            self._replace(proxies)
+            logger.info(f"Proxy pool refreshed with {len(proxies)} proxies")
+
+    def _refresh_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.refresh()
+
+    def _score(self, stats: ProxyStats) -> float:
+        latency = stats.latency if stats.latency is not None else self.default_latency
+        return stats.success_rate / max(latency, 0.05)
+
+    def acquire(self) -> Dict:
+        """Pick a healthy proxy, favouring fast and reliable ones"""
+        now = time.time()
+        with self._lock:
+            if not self._proxies:
+                raise ValueError("Proxy pool is empty")
+            healthy = [key for key, stats in self._stats.items() if stats.quarantined_until <= now]
+            if not healthy:
+                # Everything is quarantined; use whichever comes back first
+                key = min(self._stats, key=lambda k: self._stats[k].quarantined_until)
+                return self._proxies[key]
+            weights = [self._score(self._stats[key]) for key in healthy]
+            key = random.choices(healthy, weights=weights, k=1)[0]
+            return self._proxies[key]
+
+    def report_success(self, proxy: Dict, latency: float) -> None:
+        with self._lock:
+            stats = self._stats.get(self.key(proxy))
+            if stats is None:
+                return
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.quarantined_until = 0.0
+            if stats.latency is None:
+                stats.latency = latency
+            else:
+                stats.latency += self.latency_alpha * (latency - stats.latency)
+
+    def report_failure(self, proxy: Dict) -> None:
+        with self._lock:
+            stats = self._stats.get(self.key(proxy))
+            if stats is None:
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            backoff = min(self.base_quarantine * 2 ** (stats.consecutive_failures - 1), self.max_quarantine)
+            stats.quarantined_until = time.time() + backoff
+
+    def snapshot(self) -> List[Dict]:
+        """Per-proxy health, best first"""
+        now = time.time()
+        with self._lock:
+            rows = [
+                {
+                    "proxy": key,
+                    "successes": stats.successes,
+                    "failures": stats.failures,
+                    "latency": stats.latency,
+                    "quarantined": stats.quarantined_until > now,
+                    "score": self._score(stats),
+                }
+                for key, stats in self._stats.items()
+            ]
+        return sorted(rows, key=lambda row: row["score"], reverse=True)
+
+    def close(self) -> None:
+        self._stop.set()
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower() or url
+
+
+def status_of(error: BaseException) -> Optional[int]:
+    """Best-effort HTTP status for an exception raised by requests, groq, aiohttp or DDGS"""
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None) or getattr(response, "status", None)
+    if status is None and "ratelimit" in type(error).__name__.lower():
+        status = 429
+    return status if isinstance(status, int) else None
+
+
+def retry_after_of(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket whose refill rate adapts to the host: additive increase on success,
+    multiplicative decrease on errors, and a hard pause on 429/Retry-After."""
+
+    def __init__(self, rate: float, burst: float, min_rate: float, max_rate: float,
+                 increase: float = 0.05, error_backoff: float = 0.8, throttle_backoff: float = 0.5):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.error_backoff = error_backoff
+        self.throttle_backoff = throttle_backoff
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        start = max(self.updated, self.paused_until)
+        if now > start:
+            self.tokens = min(self.burst, self.tokens + (now - start) * self.rate)
+        self.updated = max(now, self.updated)
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            delay = max(self.paused_until - now, 0.0)
+            if self.tokens < 0:
+                delay += -self.tokens / self.rate
+            return delay
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_error(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.error_backoff)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.throttle_backoff)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+
+class HostRateLimiter:
+    """One adaptive TokenBucket per destination host. Safe to share between threads and event loops."""
+
+    def __init__(self, default_rate: float = 1.0, default_burst: float = 2, min_rate: float = 0.05,
+                 max_rate: float = 10.0, host_limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self.defaults = {"rate": default_rate, "burst": default_burst, "min_rate": min_rate, "max_rate": max_rate}
+        self.host_limits = host_limits or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(**{**self.defaults, **self.host_limits.get(host, {})})
+                self._buckets[host] = bucket
+            return bucket
+
+    async def acquire(self, host: str) -> None:
+        delay = self.bucket(host).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait(self, host: str) -> None:
+        """Blocking variant of acquire for synchronous callers"""
+        delay = self.bucket(host).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def report(self, host: str, error: Optional[BaseException] = None, status: Optional[int] = None) -> None:
+        """Feed an outcome back so the host's rate can adapt"""
+        bucket = self.bucket(host)
+        if error is not None and status is None:
+            status = status_of(error)
+        if status == 429 or status == 503:
+            retry_after = retry_after_of(error) if error is not None else None
+            bucket.on_throttled(retry_after)
+            logger.info(f"{host} throttled us, rate now {bucket.rate:.2f}/s")
+        elif error is not None or (status is not None and status >= 500):
+            bucket.on_error()
+        else:
+            bucket.on_success()
+
+    def rates(self) -> Dict[str, float]:
+        with self._lock:
+            return {host: bucket.rate for host, bucket in self._buckets.items()}
@@ -0,0 +1,32 @@
+from dataclasses import asdict, dataclass
+from typing import Dict
+
+
+@dataclass(slots=True)
+class SearchRecord:
+    """One search or scraped result, carried through search -> enrich -> LLM without pandas"""
+
+    url: str
+    title: str
+    description: str
+    body: str
+    timestamp: str
+    method: str
+
+    @classmethod
+    def from_ddg(cls, result: Dict, timestamp: str) -> "SearchRecord":
+        return cls(
+            url=result.get('link') or result.get('href', ''),
+            title=result.get('title', 'No title'),
+            description=result.get('snippet', 'No description'),
+            body=f"{result.get('body', '')} - {result.get('snippet', '')}",
+            timestamp=timestamp,
+            method='duckduckgo'
+        )
+
+    @classmethod
+    def from_dict(cls, row: Dict) -> "SearchRecord":
+        return cls(row['url'], row['title'], row['description'], row['body'], row['timestamp'], row['method'])
+
+    def to_dict(self) -> Dict[str, str]:
+        return asdict(self)
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from tools.metrics import METRICS
+from tools.rate_limiter import retry_after_of, status_of
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+_TRANSIENT_NAMES = ("timeout", "connection", "disconnect", "ratelimit", "temporar")
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, shared by search, scraping and LLM calls.
+
+    Errors are classified as retryable (timeouts, connection problems, 408/429/5xx and any
+    ``retry_on`` type) or fatal (other 4xx, bad input); fatal errors are raised at once.
+    A Retry-After header overrides the computed delay. The retry budget caps retries per
+    run at ``min_budget + budget_ratio * calls`` so an outage cannot multiply the load;
+    call reset() at the start of each run. Retries and give-ups are also counted in
+    METRICS as ``retries_total`` and ``retry_give_ups_total`` (by policy and reason)."""
+
+    def __init__(self, name: str, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0,
+                 budget_ratio: float = 0.2, min_budget: int = 10,
+                 retry_on: Tuple[Type[BaseException], ...] = ()):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.min_budget = min_budget
+        self.retry_on = retry_on
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.successes = 0
+            self.retries = 0
+            self.recovered = 0
+            self.failures = Counter()
+            self.errors = Counter()
+
+    def is_retryable(self, error: BaseException) -> bool:
+        status = status_of(error)
+        if status is not None:
+            return status in RETRYABLE_STATUSES
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)) or isinstance(error, self.retry_on):
+            return True
+        name = type(error).__name__.lower()
+        return any(marker in name for marker in _TRANSIENT_NAMES)
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        retry_after = retry_after_of(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _give_up_reason(self, attempt: int, error: BaseException) -> Optional[str]:
+        if not self.is_retryable(error):
+            return "fatal"
+        if attempt + 1 >= self.max_attempts:
+            return "exhausted"
+        if self.retries >= self.min_budget + self.budget_ratio * self.calls:
+            return "budget"
+        return None
+
+    def _take_retry(self, attempt: int, error: BaseException) -> Optional[float]:
+        """Delay before the next attempt, or None when the error should be raised"""
+        with self._lock:
+            self.errors[type(error).__name__] += 1
+            reason = self._give_up_reason(attempt, error)
+            if reason is not None:
+                self.failures[reason] += 1
+            else:
+                self.retries += 1
+        if reason is not None:
+            METRICS.inc("retry_give_ups_total", policy=self.name, reason=reason)
+            return None
+        METRICS.inc("retries_total", policy=self.name)
+        return self.delay(attempt, error)
+
+    def _succeeded(self, attempt: int) -> None:
+        with self._lock:
+            self.successes += 1
+            if attempt:
+                self.recovered += 1
+
+    def _started(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        self._started()
+        return await self._attempts(0, func, args, kwargs)
+
+    async def call_after(self, error: BaseException, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """call() for work whose first attempt already failed with ``error``: retries follow
+        the usual classification, backoff and budget, and ``error`` is raised if none is allowed"""
+        self._started()
+        await self._wait_for_retry(0, error)
+        return await self._attempts(1, func, args, kwargs)
+
+    async def _wait_for_retry(self, attempt: int, error: BaseException) -> None:
+        delay = self._take_retry(attempt, error)
+        if delay is None:
+            raise error
+        logger.info(f"{self.name}: attempt {attempt + 1} failed ({error}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def _attempts(self, attempt: int, func: Callable[..., Awaitable[Any]], args, kwargs) -> Any:
+        while True:
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._wait_for_retry(attempt, e)
+                attempt += 1
+                continue
+            self._succeeded(attempt)
+            return result
+
+    def call_sync(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        self._started()
+        attempt = 0
+        while True:
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                delay = self._take_retry(attempt, e)
+                if delay is None:
+                    raise
+                logger.info(f"{self.name}: attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._succeeded(attempt)
+            return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "successes": self.successes,
+                "retries": self.retries,
+                "recovered": self.recovered,
+                "failures": dict(self.failures),
+                "errors": dict(self.errors.most_common()),
+            }
@@ -1,57 +1,56 @@
 import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.firefox.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.firefox import GeckoDriverManager
 from typing import Dict, Optional, List
 import logging
 from urllib.parse import urlparse
-import time
 from selenium.common.exceptions import NoSuchElementException
 from requests.exceptions import RequestException
 import re
 import pandas as pd
 from datetime import datetime
 import html
+import asyncio
+import aiohttp
+from tools.rate_limiter import HostRateLimiter, host_of
+from tools.driver_pool import DriverPool, get_default_driver_pool
+from tools.extract import ExtractedPage, get_extractor
+from tools.parse_pool import ParsePool
+from tools.retry import RetryPolicy
+from tools.metrics import METRICS
 
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+logger = logging.getLogger(__name__)
 
-
-
-
-
-
+EMPTY_MARKERS = ["", "No title found", "No description found", "No body content found"]
 
 
 class WebScraper:
-    def __init__(self, timeout: int = 20, max_retries: int = 3):
+    def __init__(self, timeout: int = 20, max_retries: int = 3, rate_limiter: Optional[HostRateLimiter] = None,
+                 driver_pool: Optional[DriverPool] = None, extractor: str = "lxml", body_chars: int = 1000,
+                 retry_policy: Optional[RetryPolicy] = None):
         self.timeout = timeout
         self.max_retries = max_retries
-        self._setup_logging()
-        self._setup_selenium_options()
+        self.retry_policy = retry_policy or RetryPolicy(
+            "scrape", max_attempts=max_retries, base_delay=1.0,
+            retry_on=(requests.ConnectionError, requests.Timeout, aiohttp.ClientConnectionError)
+        )
+        self.extractor = get_extractor(extractor)
+        self.body_chars = body_chars
+        self.rate_limiter = rate_limiter or HostRateLimiter(default_rate=1.0, default_burst=2)
+        # Level and handlers come from the application's logging config
+        self.logger = logger
+        self._setup_selenium_options(driver_pool)
         self.results = []
 
-    def _setup_logging(self) -> None:
-        self.logger = logging.getLogger(__name__)
-        if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
-            self.logger.setLevel(logging.INFO)
-
-    def _setup_selenium_options(self) -> None:
-        self.options = Options()
-        self.options.add_argument('--headless')
-        self.options.add_argument('--no-sandbox')
-        self.options.add_argument('--disable-dev-shm-usage')
-        self.options.add_argument('--disable-gpu')
-        self.options.add_argument('--window-size=1920,1080')
-        self.options.add_argument('--disable-notifications')
-        self.service = Service(GeckoDriverManager().install())
+    def _setup_selenium_options(self, driver_pool: Optional[DriverPool] = None) -> None:
+        # Browsers are started lazily and shared; nothing is launched or downloaded here
+        self.driver_pool = driver_pool or get_default_driver_pool()
 
     def _clean_text(self, text: str) -> str:
         if not text:
@@ -61,91 +60,103 @@ class WebScraper:
         text = text.strip()
         return text
 
-    def _get_content_requests(self, url: str) -> Optional[Dict[str, str]]:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
+    def _parse_html(self, url: str, text: str, method: str) -> Dict[str, str]:
+        # The extractor stops walking the page once body_chars of text are collected
+        return self._page_row(url, self.extractor.extract(text, budget=self.body_chars), method)
+
+    @staticmethod
+    def _page_row(url: str, page: ExtractedPage, method: str) -> Dict[str, str]:
+        return {
+            "url": url,
+            "title": page.title or "No title found",
+            "description": page.description or "No description found",
+            "body": page.body or "No body content found",
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "method": method
+        }
+
+    @staticmethod
+    def _is_empty(content: Optional[Dict[str, str]]) -> bool:
+        return not content or all(val in EMPTY_MARKERS
+                                  for val in [content['title'], content['description'], content['body']])
+
+    @staticmethod
+    def _failed_row(url: str, title: str, detail: str, method: str) -> Dict[str, str]:
+        return {
+            "url": url,
+            "title": title,
+            "description": detail,
+            "body": detail,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "method": method
         }
 
-        for attempt in range(self.max_retries):
+    def _fetch_requests(self, url: str, host: str) -> str:
+        self.rate_limiter.wait(host)
+        try:
+            response = requests.get(url, headers=DEFAULT_HEADERS, timeout=self.timeout)
+            response.raise_for_status()
+        except RequestException as e:
+            self.rate_limiter.report(host, error=e)
+            self.logger.warning(f"requests failed for {url}: {str(e)}")
+            raise
+        self.rate_limiter.report(host)
+        return response.text
+
+    def _get_content_requests(self, url: str) -> Optional[Dict[str, str]]:
+        with METRICS.timer("scrape_seconds", method="requests") as timing:
             try:
-                response = requests.get(url, headers=headers, timeout=self.timeout)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, "html.parser")
-                
-                title = self._clean_text(soup.title.text) if soup.title else ""
-                
-                description = soup.find("meta", {"name": ["description", "Description"]})
-                if not description:
-                    description = soup.find("meta", {"property": "og:description"})
-                description = self._clean_text(description["content"]) if description else ""
-                
-                body = self._clean_text(soup.body.get_text(" ")) if soup.body else ""
-                
-                return {
-                    "url": url,
-                    "title": title or "No title found",
-                    "description": description or "No description found",
-                    "body": body[:1000] if body else "No body content found",
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "method": "requests"
-                }
-
-            except RequestException as e:
-                self.logger.warning(f"Attempt {attempt + 1} failed with requests: {str(e)}")
-                if attempt == self.max_retries - 1:
-                    return None
-                time.sleep(2)
+                text = self.retry_policy.call_sync(self._fetch_requests, url, host_of(url))
+            except RequestException:
+                timing["status"] = "failed"
+                return None
+            return self._parse_html(url, text, "requests")
 
     def _get_content_selenium(self, url: str) -> Optional[Dict[str, str]]:
-        driver = None
+        with METRICS.timer("scrape_seconds", method="selenium") as timing:
+            content = self._fetch_selenium(url)
+            if content is None:
+                timing["status"] = "failed"
+            return content
+
+    def _fetch_selenium(self, url: str) -> Optional[Dict[str, str]]:
         try:
-            driver = webdriver.Firefox(service=self.service, options=self.options)
-            driver.set_page_load_timeout(self.timeout)
-            
-            driver.get(url)
-            wait = WebDriverWait(driver, self.timeout)
-            
-            title = driver.title
-            
-            description = ""
-            try:
-                description = driver.find_element(By.CSS_SELECTOR, 
-                    'meta[name="description"], meta[property="og:description"]').get_attribute("content")
-            except NoSuchElementException:
-                pass
-            
-            wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-            body = driver.find_element(By.TAG_NAME, "body").text
+            with self.driver_pool.driver() as driver:
+                driver.get(url)
+                wait = WebDriverWait(driver, self.timeout)
+                
+                title = driver.title
+                
+                description = ""
+                try:
+                    description = driver.find_element(By.CSS_SELECTOR, 
+                        'meta[name="description"], meta[property="og:description"]').get_attribute("content")
+                except NoSuchElementException:
+                    pass
+                
+                wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                body = driver.find_element(By.TAG_NAME, "body").text
             
             return {
                 "url": url,
                 "title": self._clean_text(title) or "No title found",
                 "description": self._clean_text(description) or "No description found",
-                "body": self._clean_text(body)[:1000] if body else "No body content found",
+                "body": self._clean_text(body)[:self.body_chars] if body else "No body content found",
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 "method": "selenium"
             }
             
         except Exception as e:
+            # The pool has already discarded the browser that raised
             self.logger.error(f"Selenium error: {str(e)}")
             return None
-            
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except Exception as e:
-                    self.logger.error(f"Error closing driver: {str(e)}")
 
     def scrape(self, urls: List[str]) -> pd.DataFrame:
         """Scrape multiple URLs and return results as DataFrame"""
         results = []
         
         for url in urls:
-            self.logger.info(f"Scraping: {url}")
+            self.logger.debug(f"Scraping: {url}")
             
             try:
                 result = urlparse(url)
@@ -153,45 +164,135 @@ class WebScraper:
                     raise ValueError("Invalid URL format")
                 
                 content = self._get_content_requests(url)
-                if not content or all(val in ["", "No title found", "No description found", "No body content found"] 
-                                   for val in [content['title'], content['description'], content['body']]):
+                if self._is_empty(content):
                     self.logger.info("Falling back to Selenium")
                     content = self._get_content_selenium(url)
                 
                 if content:
                     results.append(content)
-                    self.logger.info(f"Successfully scraped using {content['method']}")
+                    self.logger.debug(f"Successfully scraped using {content['method']}")
                 else:
                     self.logger.error("Failed to scrape with both methods")
-                    results.append({
-                        "url": url,
-                        "title": "Failed to scrape",
-                        "description": "Failed to scrape",
-                        "body": "Failed to scrape",
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "method": "failed"
-                    })
+                    results.append(self._failed_row(url, "Failed to scrape", "Failed to scrape", "failed"))
                 
             except Exception as e:
                 self.logger.error(f"Error processing {url}: {str(e)}")
-                results.append({
-                    "url": url,
-                    "title": f"Error: {str(e)}",
-                    "description": "Error occurred",
-                    "body": "Error occurred",
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "method": "error"
-                })
-            
-            time.sleep(1)
+                results.append(self._failed_row(url, f"Error: {str(e)}", "Error occurred", "error"))
         
         return pd.DataFrame(results)
 
+class AsyncWebScraper(WebScraper):
+    """Concurrent variant of WebScraper on one shared aiohttp connection pool (keep-alive),
+    with an overall in-flight cap and a per-domain cap. Returns the same DataFrame schema."""
+
+    def __init__(self, timeout: int = 20, max_retries: int = 3, rate_limiter: Optional[HostRateLimiter] = None,
+                 max_in_flight: int = 20, max_per_domain: int = 2, selenium_fallback: bool = True,
+                 driver_pool: Optional[DriverPool] = None, extractor: str = "lxml", body_chars: int = 1000,
+                 parse_pool: Optional[ParsePool] = None, retry_policy: Optional[RetryPolicy] = None):
+        super().__init__(timeout=timeout, max_retries=max_retries, rate_limiter=rate_limiter,
+                         driver_pool=driver_pool, extractor=extractor, body_chars=body_chars,
+                         retry_policy=retry_policy)
+        # With a parse pool, raw bytes are parsed in worker processes instead of on the event loop
+        self.parse_pool = parse_pool
+        self.max_in_flight = max_in_flight
+        self.max_per_domain = max_per_domain
+        self.selenium_fallback = selenium_fallback
+        self._session = None
+        self._session_loop = None
+        self._in_flight = None
+        self._domain_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.max_per_domain,
+                                             ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=DEFAULT_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._session_loop = loop
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            self._domain_limits = {}
+        return self._session
+
+    def _domain_limit(self, host: str) -> asyncio.Semaphore:
+        if host not in self._domain_limits:
+            self._domain_limits[host] = asyncio.Semaphore(self.max_per_domain)
+        return self._domain_limits[host]
+
+    async def _fetch_aiohttp(self, session: aiohttp.ClientSession, url: str, host: str):
+        """(raw bytes, charset) with a parse pool, else (decoded text, None)"""
+        await self.rate_limiter.acquire(host)
+        try:
+            async with self._domain_limit(host), self._in_flight:
+                async with session.get(url) as response:
+                    response.raise_for_status()
+                    if self.parse_pool is not None:
+                        content = (await response.read(), response.charset)
+                    else:
+                        content = (await response.text(errors="replace"), None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.rate_limiter.report(host, error=e)
+            self.logger.warning(f"aiohttp failed for {url}: {str(e)}")
+            raise
+        self.rate_limiter.report(host)
+        return content
+
+    async def _get_content_aiohttp(self, url: str) -> Optional[Dict[str, str]]:
+        session = await self._get_session()
+        with METRICS.timer("scrape_seconds", method="aiohttp") as timing:
+            try:
+                content, encoding = await self.retry_policy.call(self._fetch_aiohttp, session, url, host_of(url))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                timing["status"] = "failed"
+                return None
+        with METRICS.timer("html_parse_seconds", pool=self.parse_pool is not None):
+            if self.parse_pool is not None:
+                page = await self.parse_pool.parse_page(content, encoding, self.body_chars)
+                return self._page_row(url, page, "aiohttp")
+            return self._parse_html(url, content, "aiohttp")
+
+    async def scrape_one(self, url: str) -> Dict[str, str]:
+        self.logger.debug(f"Scraping: {url}")
+        try:
+            result = urlparse(url)
+            if not all([result.scheme, result.netloc]):
+                raise ValueError("Invalid URL format")
+
+            content = await self._get_content_aiohttp(url)
+            if self._is_empty(content) and self.selenium_fallback:
+                self.logger.info("Falling back to Selenium")
+                loop = asyncio.get_running_loop()
+                content = await loop.run_in_executor(None, self._get_content_selenium, url)
+
+            if content:
+                self.logger.debug(f"Successfully scraped using {content['method']}")
+                return content
+            self.logger.error("Failed to scrape with both methods")
+            return self._failed_row(url, "Failed to scrape", "Failed to scrape", "failed")
+
+        except Exception as e:
+            self.logger.error(f"Error processing {url}: {str(e)}")
+            return self._failed_row(url, f"Error: {str(e)}", "Error occurred", "error")
+
+    async def scrape_async(self, urls: List[str]) -> pd.DataFrame:
+        """Scrape all URLs concurrently; rows keep the input order"""
+        results = await asyncio.gather(*(self.scrape_one(url) for url in urls))
+        return pd.DataFrame(list(results))
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
 def scrape_url_list(urls):
     "List of urls to scrape"    
     scraper = WebScraper(timeout=20, max_retries=3)
     df = scraper.scrape(urls)
     print("\nScraping Results:")
     print(df[['url', 'title', 'method']])
+    return df
 
 
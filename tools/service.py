@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ScraperService:
+    """One long-lived scraper shared by every caller in the process.
+
+    The scraper is built once, so the proxy pool, DDGS/LLM clients, HTTP connection pools
+    and caches stay warm across runs and users. All of its coroutines run on a single
+    event loop owned by a daemon thread; callers on any thread hand work over with
+    ``submit``/``run``. Because everything shares that loop, the scraper's own search/LLM
+    semaphores and rate limiters bound the whole process, and at most ``max_jobs``
+    ``process_dataframe`` batches run at once (the rest wait their turn).
+    """
+
+    def __init__(self, scraper_factory: Callable[[], object], max_jobs: int = 2):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="scraper-service", daemon=True)
+        self._thread.start()
+        self._job_slots = asyncio.Semaphore(max_jobs)
+        self._closed = False
+        self.scraper = scraper_factory()
+        logger.info(f"Scraper service started ({type(self.scraper).__name__}, max_jobs={max_jobs})")
+
+    def submit(self, coro: Awaitable[T]) -> "Future[T]":
+        """Schedule ``coro`` on the service loop; cancelling the future cancels the task"""
+        if self._closed:
+            raise RuntimeError("Scraper service is closed")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run ``coro`` on the service loop and block the calling thread for its result"""
+        return self.submit(coro).result(timeout)
+
+    def process_dataframe(self, df: pd.DataFrame, on_start: Optional[Callable[[], None]] = None,
+                          **kwargs) -> "Future[pd.DataFrame]":
+        """Queue a batch; ``on_start()`` is called once it gets a job slot. kwargs go to
+        the scraper's process_dataframe, whose callbacks are called on the service thread."""
+        return self.submit(self._process_dataframe(df, on_start, **kwargs))
+
+    async def _process_dataframe(self, df: pd.DataFrame, on_start: Optional[Callable[[], None]],
+                                 **kwargs) -> pd.DataFrame:
+        async with self._job_slots:
+            if on_start:
+                on_start()
+            return await self.scraper.process_dataframe(df, **kwargs)
+
+    def close(self) -> None:
+        """Close the scraper on its loop, then stop the loop"""
+        if self._closed:
+            return
+        closer = getattr(self.scraper, "aclose", None) or self.scraper.close
+        result = closer()
+        if asyncio.iscoroutine(result):
+            self.run(result, timeout=30)
+        self._closed = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
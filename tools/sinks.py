@@ -0,0 +1,287 @@
+import math
+import os
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 18 digits with cents covers any product price; wider values are misreads and become null
+PRICE_TYPE = pa.decimal128(18, 2)
+
+BASE_FIELDS = [pa.field("original_query", pa.string()), pa.field("search_type", pa.string())]
+# Typed columns per search_type, in prompt order. Derived columns (price_currency) are
+# only in the columnar formats; CSV keeps the raw answer text.
+TYPED_FIELDS = {
+    "product": [
+        pa.field("product_name", pa.string()),
+        pa.field("category", pa.string()),
+        pa.field("price", PRICE_TYPE),
+        pa.field("price_currency", pa.string()),
+        pa.field("source_url", pa.string()),
+    ],
+    "location": [
+        pa.field("location_name", pa.string()),
+        pa.field("type", pa.string()),
+        pa.field("country", pa.string()),
+        pa.field("population", pa.int64()),
+        pa.field("area", pa.float64()),  # km²
+    ],
+    "company": [
+        pa.field("company_name", pa.string()),
+        pa.field("industry", pa.string()),
+        pa.field("revenue", pa.string()),
+        pa.field("headquarters", pa.string()),
+    ],
+}
+DERIVED_FIELDS = {"price_currency"}
+
+_NUMBER = r"\d(?:[\d.,]*\d)?"
+_AMOUNT = re.compile(_NUMBER)
+_QUANTITY = re.compile(rf"({_NUMBER})\s*(thousand|million|billion|mn|bn|k|m|b)?\b", re.I)
+_MULTIPLIERS = {"thousand": 1e3, "k": 1e3, "million": 1e6, "mn": 1e6, "m": 1e6, "billion": 1e9, "bn": 1e9, "b": 1e9}
+# Unit written right after the number; "605.4 km² (233.7 sq mi)" is in km²
+_SQUARE_MILES = re.compile(r"\s*(sq\.?\s*mi|mi²|mi2|square mile)", re.I)
+_KM2_PER_MI2 = 2.589988110336
+_CURRENCY_CODE = re.compile(r"\b(USD|EUR|GBP|CAD|AUD|MXN|JPY|INR)\b", re.I)
+_CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR"}
+
+
+def _is_null(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _to_number(token: str) -> Optional[str]:
+    """Plain decimal string for "1,299.99", "1.299,99", "12,50" or "1.234.567"; None if unclear"""
+    if "," in token and "." in token:
+        # Whichever separator comes last is the decimal point
+        decimal, thousands = (",", ".") if token.rfind(",") > token.rfind(".") else (".", ",")
+        token = token.replace(thousands, "").replace(decimal, ".")
+    elif re.fullmatch(r"\d+,\d{2}", token):
+        token = token.replace(",", ".")
+    elif token.count(".") > 1:
+        token = token.replace(".", "")
+    else:
+        token = token.replace(",", "")
+    return token if re.fullmatch(r"\d+(\.\d+)?", token) else None
+
+
+def parse_price(value) -> Optional[Decimal]:
+    """First amount in an answer like "$1,299.99", "1.299,99 €" or "12,50 €"; None if there
+    is none or it cannot be read unambiguously (e.g. "1.299 €", thousands or 1.299?)"""
+    if _is_null(value):
+        return None
+    match = _AMOUNT.search(str(value))
+    number = _to_number(match.group()) if match else None
+    if number is None or len(number.partition(".")[2]) > 2:
+        return None
+    try:
+        price = Decimal(number).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+    return price if price.adjusted() < 16 else None
+
+
+def parse_currency(value) -> Optional[str]:
+    if _is_null(value):
+        return None
+    text = str(value)
+    code = _CURRENCY_CODE.search(text)
+    if code:
+        return code.group().upper()
+    return next((currency for symbol, currency in _CURRENCY_SYMBOLS.items() if symbol in text), None)
+
+
+def _match_quantity(value) -> Optional[Tuple[float, str]]:
+    """(first number times its multiplier, the text after it)"""
+    if _is_null(value):
+        return None
+    text = str(value)
+    match = _QUANTITY.search(text)
+    number = _to_number(match.group(1)) if match else None
+    if number is None:
+        return None
+    return float(number) * _MULTIPLIERS.get((match.group(2) or "").lower(), 1), text[match.end():]
+
+
+def parse_count(value) -> Optional[int]:
+    """Population-style counts: "1,234,567", "8.3 million (2023)" """
+    quantity = _match_quantity(value)
+    return int(round(quantity[0])) if quantity is not None else None
+
+
+def parse_area(value) -> Optional[float]:
+    """Area in km²; a number given in square miles is converted"""
+    quantity = _match_quantity(value)
+    if quantity is None:
+        return None
+    number, rest = quantity
+    return number * _KM2_PER_MI2 if _SQUARE_MILES.match(rest) else number
+
+
+def _parse_text(value) -> Optional[str]:
+    return None if _is_null(value) else str(value)
+
+
+# Column -> function of the whole row; anything not listed is kept as text
+_CONVERTERS: Dict[str, Callable[[Dict], object]] = {
+    "price": lambda row: parse_price(row.get("price")),
+    "price_currency": lambda row: parse_currency(row.get("price")),
+    "population": lambda row: parse_count(row.get("population")),
+    "area": lambda row: parse_area(row.get("area")),
+}
+
+
+def result_schema(search_types: Optional[Iterable[str]] = None, row_id: bool = False) -> pa.Schema:
+    """Union of the typed fields of ``search_types`` (all of them by default); rows of
+    another search_type leave those columns null"""
+    fields = [pa.field("row_id", pa.int64())] if row_id else []
+    fields += BASE_FIELDS
+    for search_type in (search_types or TYPED_FIELDS):
+        fields += TYPED_FIELDS[search_type]
+    return pa.schema(fields)
+
+
+def to_table(rows: List[Dict], schema: pa.Schema) -> pa.Table:
+    columns = {}
+    for field in schema:
+        convert = _CONVERTERS.get(field.name)
+        if convert is not None:
+            columns[field.name] = [convert(row) for row in rows]
+        elif field.name == "row_id":
+            columns[field.name] = [None if _is_null(row.get("row_id")) else int(row["row_id"]) for row in rows]
+        else:
+            columns[field.name] = [_parse_text(row.get(field.name)) for row in rows]
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+class ResultSink:
+    """Streams result rows into one file. Rows are buffered and written ``row_group_size``
+    at a time, so memory stays flat however long the run is. The file's columns are
+    fixed by the first rows written (``row_id`` is included if they carry one)."""
+
+    format = ""
+    mime = "application/octet-stream"
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._buffer: List[Dict] = []
+        self._row_id: Optional[bool] = None
+
+    def write(self, rows: Iterable[Dict]) -> None:
+        self._buffer.extend(rows)
+        while len(self._buffer) >= self.row_group_size:
+            self._write_group(self._buffer[:self.row_group_size])
+            del self._buffer[:self.row_group_size]
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._write_group(self._buffer)
+            self._buffer = []
+
+    def _write_group(self, rows: List[Dict]) -> None:
+        if self._row_id is None:
+            self._row_id = "row_id" in rows[0]
+        self._write_rows(rows)
+        self.rows_written += len(rows)
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self.flush()
+        if self._row_id is None:
+            # Nothing was written; still leave a valid, empty file behind
+            self._row_id = False
+            self._write_rows([])
+        self._close()
+
+    def _close(self) -> None:
+        pass
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CsvSink(ResultSink):
+    """Raw answer text, one header for every search_type, appended chunk by chunk"""
+
+    format = "csv"
+    mime = "text/csv"
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        columns = [field.name for field in result_schema(row_id=self._row_id) if field.name not in DERIVED_FIELDS]
+        first = self.rows_written == 0
+        pd.DataFrame(rows, columns=columns).to_csv(self.path, mode="w" if first else "a", header=first, index=False)
+
+
+class ParquetSink(ResultSink):
+    """Typed Parquet, one row group per ``row_group_size`` rows, zstd-compressed"""
+
+    format = "parquet"
+    mime = "application/vnd.apache.parquet"
+
+    def __init__(self, path: str, row_group_size: int = 1000, compression: str = "zstd"):
+        super().__init__(path, row_group_size)
+        self.compression = compression
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        schema = result_schema(row_id=self._row_id)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, schema, compression=self.compression)
+        self._writer.write_table(to_table(rows, schema))
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ArrowSink(ResultSink):
+    """Typed Arrow IPC file (Feather v2), one record batch per ``row_group_size`` rows"""
+
+    format = "arrow"
+    mime = "application/vnd.apache.arrow.file"
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        super().__init__(path, row_group_size)
+        self._writer = None
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        schema = result_schema(row_id=self._row_id)
+        if self._writer is None:
+            self._writer = pa.ipc.new_file(self.path, schema)
+        self._writer.write_table(to_table(rows, schema))
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+SINKS = {sink.format: sink for sink in (CsvSink, ParquetSink, ArrowSink)}
+_EXTENSIONS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+
+
+def open_sink(path: str, format: Optional[str] = None, **kwargs) -> ResultSink:
+    """Sink for ``format`` (csv, parquet or arrow), guessed from the extension if not given"""
+    if format is None:
+        format = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if format not in SINKS:
+        raise ValueError(f"Unknown output format for {path}; use one of {sorted(SINKS)}")
+    return SINKS[format](path, **kwargs)
+
+
+def save_results(df: pd.DataFrame, path: str, format: Optional[str] = None) -> str:
+    """Write a finished results DataFrame through a sink; returns the path"""
+    with open_sink(path, format) as sink:
+        sink.write(df.to_dict("records"))
+    return path
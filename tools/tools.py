@@ -1,15 +1,35 @@
+import time
 import scrapy
 from scrapy.http import HtmlResponse
-from bs4 import BeautifulSoup
+from twisted.internet import defer
+from tools.extract import extract_article, get_extractor
+
+
+def deferred_from_future(future):
+    """Wrap a concurrent.futures.Future so a Scrapy callback can await it without blocking the reactor"""
+    from twisted.internet import reactor  # imported late so importing this module never installs a reactor
+
+    d = defer.Deferred()
+
+    def done(f):
+        if f.exception() is not None:
+            reactor.callFromThread(d.errback, f.exception())
+        else:
+            reactor.callFromThread(d.callback, f.result())
+
+    future.add_done_callback(done)
+    return d
 
 class JinaSpider(scrapy.Spider):
     name = "jina_spider"
-    all_results = []
     
-    def __init__(self, urls_list=None, *args, **kwargs):
+    max_chars = 2000
+
+    def __init__(self, urls_list=None, extractor="lxml", parse_pool=None, *args, **kwargs):
         super(JinaSpider, self).__init__(*args, **kwargs)
         self.start_urls = urls_list or []
-        JinaSpider.all_results = []
+        self.extractor = get_extractor(extractor)
+        self.parse_pool = parse_pool
 
     def start_requests(self):
         seen_urls = set()
@@ -18,69 +38,144 @@ class JinaSpider(scrapy.Spider):
                 seen_urls.add(url)
                 yield scrapy.Request(url=url, callback=self.parse)
 
-    def parse(self, response: HtmlResponse):
+    async def parse(self, response: HtmlResponse):
+        started = time.perf_counter()
         try:
-            print(f"\nProcessing URL: {response.url}")
+            self.logger.debug(f"Processing URL: {response.url}")
             
             if any(x in response.text.lower() for x in ['request rejected', 'access denied', 'captcha']):
-                print(f"Access blocked for URL: {response.url}")
-                print("Response status:", response.status)
-                print("Response headers:", response.headers)
+                self.logger.info(f"Access blocked for URL: {response.url} (status {response.status})")
+                self.logger.debug(f"Response headers: {response.headers}")
                 return
                 
-            soup = BeautifulSoup(response.body, 'html.parser')
-            
-            title = soup.title.string if soup.title else "No title"
-            print(f"Page title: {title}")
-            
-            for element in soup(['script', 'style', 'meta', 'link', 'footer', 'nav', 'aside']):
-                element.decompose()
-            
-            # Focus on main content areas
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-            if main_content:
-                text_content = ' '.join(main_content.stripped_strings)
+            # Focus on main content areas, skipping page chrome
+            if self.parse_pool is not None:
+                future = self.parse_pool.submit_article(response.body, response.encoding, self.max_chars)
+                title, text_content = await deferred_from_future(future)
             else:
-                # Fallback to body content
-                text_content = ' '.join(soup.body.stripped_strings if soup.body else soup.stripped_strings)
+                title, text_content = extract_article(self.extractor, response.text, self.max_chars)
             
-            # Clean up the text
-            text_content = ' '.join(
-                text for text in text_content.split()
-                if len(text) > 1
-            )
-            
-            if len(text_content) > 2000:
-                text_content = text_content[:2000]
-                last_period = text_content.rfind('.')
-                if last_period > 0:
-                    text_content = text_content[:last_period + 1]
+            title = title or "No title"
+            self.logger.debug(f"Page title: {title}")
             
             if len(text_content.strip()) > 100:
-                JinaSpider.all_results.append({
+                self.logger.debug(f"Successfully extracted {len(text_content)} characters")
+                # Download plus extraction time, picked up by the item collector
+                response.meta['item_seconds'] = response.meta.get('download_latency', 0.0) + time.perf_counter() - started
+                yield {
                     '####url': response.url,
                     '####content': text_content.strip()
-                })
-                print(f"Successfully extracted {len(text_content)} characters")
+                }
             else:
-                print(f"Extracted content too short: {len(text_content)} characters")
+                self.logger.info(f"Extracted content too short: {len(text_content)} characters ({response.url})")
 
         except Exception as e:
-            print(f"Error parsing {response.url}: {str(e)}")
-            print("Response status:", response.status)
-            print("Response headers:", response.headers)
+            self.logger.warning(f"Error parsing {response.url} (status {response.status}): {str(e)}")
+            self.logger.debug(f"Response headers: {response.headers}")
 
-from scrapy.crawler import CrawlerProcess
+import asyncio
+import threading
+from concurrent.futures import Future
+from scrapy import signals
+from scrapy.crawler import CrawlerRunner
+from tools.metrics import METRICS
 
-def run_spider(list_of_results):
-    process = CrawlerProcess(settings={
-        "LOG_LEVEL": "ERROR"
-    })
-    
-    process.crawl(JinaSpider, urls_list=list_of_results)
-    process.start()
-    
-    return JinaSpider.all_results
+DEFAULT_SPIDER_SETTINGS = {
+    "LOG_LEVEL": "ERROR",
+    "CONCURRENT_REQUESTS": 32,
+    "CONCURRENT_REQUESTS_PER_DOMAIN": 4,
+    "DOWNLOAD_TIMEOUT": 20,
+    "RETRY_TIMES": 1,
+    "AUTOTHROTTLE_ENABLED": True,
+    "AUTOTHROTTLE_START_DELAY": 0.5,
+    "AUTOTHROTTLE_MAX_DELAY": 10,
+    "AUTOTHROTTLE_TARGET_CONCURRENCY": 4.0,
+    "HTTPCACHE_ENABLED": False,
+    "HTTPCACHE_EXPIRATION_SECS": 86400,
+    "HTTPCACHE_DIR": "httpcache",
+}
+
+_reactor_thread = None
+_reactor_lock = threading.Lock()
+
+
+def _start_reactor():
+    """Run the Twisted reactor once per process on a daemon thread; it is never stopped,
+    which is what lets crawls be started again and again"""
+    global _reactor_thread
+    with _reactor_lock:
+        if _reactor_thread is None:
+            from twisted.internet import reactor
+            _reactor_thread = threading.Thread(
+                target=reactor.run, kwargs={"installSignalHandlers": False}, name="twisted-reactor", daemon=True
+            )
+            _reactor_thread.start()
+
+
+class _ItemCollector:
+    # Scrapy holds signal receivers weakly, so the receiver is a method on an object the crawl keeps alive
+    def __init__(self):
+        self.items = []
+        self.seconds = []
+
+    def add(self, item, response, spider):
+        self.items.append(dict(item))
+        if 'item_seconds' in response.meta:
+            self.seconds.append(response.meta['item_seconds'])
+            METRICS.observe("spider_item_seconds", response.meta['item_seconds'])
+
+
+class SpiderRunner:
+    """Long-lived CrawlerRunner that can crawl repeatedly in-process, from sync or asyncio code.
+    Each call returns its own items; nothing is shared between crawls."""
+
+    def __init__(self, settings=None):
+        self.settings = {**DEFAULT_SPIDER_SETTINGS, **(settings or {})}
+        self._runner = None
+
+    def _crawl_in_reactor(self, urls, spider_kwargs, future: Future, timings=None) -> None:
+        try:
+            if self._runner is None:
+                self._runner = CrawlerRunner(self.settings)
+            collector = _ItemCollector()
+            crawler = self._runner.create_crawler(JinaSpider)
+            crawler.signals.connect(collector.add, signal=signals.item_scraped)
+            d = self._runner.crawl(crawler, urls_list=urls, **spider_kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        if timings is not None:
+            d.addCallback(lambda _: timings.extend(collector.seconds))
+        d.addCallback(lambda _: future.set_result(collector.items))
+        d.addErrback(lambda failure: future.set_exception(failure.value))
+
+    def submit(self, urls, timings=None, **spider_kwargs) -> Future:
+        """Start a crawl; if ``timings`` is a list, each item's download+parse seconds are added to it"""
+        _start_reactor()
+        from twisted.internet import reactor
+        future = Future()
+        reactor.callFromThread(self._crawl_in_reactor, list(urls), spider_kwargs, future, timings)
+        return future
+
+    def crawl(self, urls, timings=None, **spider_kwargs):
+        """Blocking crawl; JinaSpider kwargs (extractor, parse_pool) pass through"""
+        return self.submit(urls, timings, **spider_kwargs).result()
+
+    async def acrawl(self, urls, timings=None, **spider_kwargs):
+        return await asyncio.wrap_future(self.submit(urls, timings, **spider_kwargs))
+
+
+_default_runner = None
+
+
+def run_spider(list_of_results, settings=None, timings=None):
+    """Crawl the URLs and return the extracted items; safe to call more than once per process"""
+    global _default_runner
+    if settings is not None:
+        return SpiderRunner(settings).crawl(list_of_results, timings)
+    if _default_runner is None:
+        _default_runner = SpiderRunner()
+    return _default_runner.crawl(list_of_results, timings)
 
 def get_default_response(search_type, error_msg="Information not available"):
     """Return properly formatted default response based on search type"""